@@ -1,19 +1,58 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, Response, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
+import base64
+import csv
+import io
+import json
+import os
+import sqlite3
+import click
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here-change-in-production'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///site.db'
+# Any SQLAlchemy URL, e.g. postgresql://user:pass@db/app; SQLite by default
+DATABASE_URL = os.environ.get('DATABASE_URL', 'sqlite:///site.db')
+app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URL
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Each gunicorn worker process has its own pool: one connection per worker
+# thread, plus some overflow for streaming responses. In-memory SQLite
+# uses a single shared connection instead.
+if DATABASE_URL not in ('sqlite://', 'sqlite:///:memory:'):
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', os.environ.get('WEB_THREADS', 4))),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 4)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': True,
+    }
+SQLITE_PRAGMAS = {
+    # Readers no longer block on a writer, and a writer on readers
+    'journal_mode': 'WAL',
+    # Durable at checkpoints; safe with WAL and avoids an fsync per commit
+    'synchronous': 'NORMAL',
+    # Wait for a concurrent writer instead of failing with "database is locked"
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+}
 db = SQLAlchemy(app)
 
+@db.event.listens_for(Engine, 'connect')
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f'PRAGMA {name}={value}')
+    cursor.close()
+
 # Database Models
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    date_created = db.Column(db.DateTime, default=datetime.utcnow)
+    date_created = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
     def __repr__(self):
         return f'<User {self.username}>'
@@ -23,19 +62,92 @@ class Contact(db.Model):
     name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(120), nullable=False)
     message = db.Column(db.Text, nullable=False)
-    date_sent = db.Column(db.DateTime, default=datetime.utcnow)
+    date_sent = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
     def __repr__(self):
         return f'<Contact {self.name}>'
 
-# Create tables
-with app.app_context():
+# Row counts kept up to date on every insert/delete, so the home page and
+# /api/stats read two rows instead of counting whole tables. Bulk statements
+# bypass the ORM events and must call adjust_stat themselves.
+class Stat(db.Model):
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+COUNTED_MODELS = {'total_users': User, 'total_messages': Contact}
+
+def adjust_stat(connection, name, delta):
+    # Runs inside the flush, in the same transaction as the row change
+    connection.execute(
+        db.update(Stat).where(Stat.name == name).values(value=Stat.value + delta)
+    )
+
+def register_counter(name, model):
+    @db.event.listens_for(model, 'after_insert')
+    def counted_insert(mapper, connection, target):
+        adjust_stat(connection, name, 1)
+
+    @db.event.listens_for(model, 'after_delete')
+    def counted_delete(mapper, connection, target):
+        adjust_stat(connection, name, -1)
+
+for stat_name, stat_model in COUNTED_MODELS.items():
+    register_counter(stat_name, stat_model)
+
+def init_stats():
+    # Seed missing counters from a one-off COUNT(*), e.g. on an existing database
+    existing = set(db.session.scalars(db.select(Stat.name)))
+    for name, model in COUNTED_MODELS.items():
+        if name not in existing:
+            count = db.session.scalar(db.select(db.func.count()).select_from(model))
+            db.session.add(Stat(name=name, value=count))
+    db.session.commit()
+
+def get_stats():
+    return dict(db.session.execute(db.select(Stat.name, Stat.value)).all())
+
+# Schema changes that create_all cannot apply to existing tables. Each one
+# runs once and is recorded in schema_migration; append new ones at the end.
+class SchemaMigration(db.Model):
+    id = db.Column(db.String(80), primary_key=True)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+def create_column_indexes(*columns):
+    for column in columns:
+        for index in column.table.indexes:
+            if column in index.columns.values():
+                index.create(db.engine, checkfirst=True)
+
+MIGRATIONS = [
+    ('0001_sort_indexes', lambda: create_column_indexes(User.__table__.c.date_created,
+                                                         Contact.__table__.c.date_sent)),
+]
+
+def upgrade_schema():
+    applied = set(db.session.scalars(db.select(SchemaMigration.id)))
+    for migration_id, migrate in MIGRATIONS:
+        if migration_id not in applied:
+            migrate()
+            db.session.add(SchemaMigration(id=migration_id))
+            db.session.commit()
+
+# Schema setup runs once per deployment (`flask init-db`), not on every
+# import, so gunicorn workers boot without touching the schema
+def init_db():
     db.create_all()
+    upgrade_schema()
+    init_stats()
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Create the tables and apply pending schema migrations."""
+    init_db()
+    click.echo('Database initialized.')
 
 # Routes
 @app.route('/')
 def home():
-    user_count = User.query.count()
+    user_count = get_stats()['total_users']
     return render_template('home.html', title='Home', user_count=user_count)
 
 @app.route('/about')
@@ -72,20 +184,19 @@ def add_user():
         flash('Username and email are required!', 'error')
         return redirect(url_for('users'))
     
-    # Check if user already exists
-    existing_user = User.query.filter_by(username=username).first()
-    if existing_user:
-        flash(f'Username {username} already exists!', 'error')
-        return redirect(url_for('users'))
-    
-    existing_email = User.query.filter_by(email=email).first()
-    if existing_email:
-        flash(f'Email {email} already exists!', 'error')
-        return redirect(url_for('users'))
-    
+    # The unique constraints do the existence check: one INSERT on success,
+    # one extra lookup only to word the error on a conflict
     new_user = User(username=username, email=email)
     db.session.add(new_user)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        if User.query.filter_by(username=username).first():
+            flash(f'Username {username} already exists!', 'error')
+        else:
+            flash(f'Email {email} already exists!', 'error')
+        return redirect(url_for('users'))
     
     flash(f'User {username} added successfully!', 'success')
     return redirect(url_for('users'))
@@ -104,24 +215,235 @@ def messages():
     all_messages = Contact.query.order_by(Contact.date_sent.desc()).all()
     return render_template('messages.html', title='Messages', messages=all_messages)
 
+# Keyset pagination for /api/users: rows are ordered by (date_created, id)
+# and a page starts right after the cursor, so every page costs the same
+# whatever its position.
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 1000
+API_STREAM_BATCH = 1000
+
+def user_to_dict(row):
+    return {
+        'id': row.id,
+        'username': row.username,
+        'email': row.email,
+        'date_created': row.date_created.strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+def encode_cursor(row):
+    key = f'{row.date_created.isoformat()}|{row.id}'
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+def decode_cursor(cursor):
+    date_created, user_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+    return datetime.fromisoformat(date_created), int(user_id)
+
+def users_after(cursor=None):
+    # Plain column rows: no ORM objects pile up in the session
+    query = db.select(User.id, User.username, User.email, User.date_created)
+    if cursor:
+        date_created, user_id = decode_cursor(cursor)
+        query = query.where(db.or_(
+            User.date_created > date_created,
+            db.and_(User.date_created == date_created, User.id > user_id)
+        ))
+    return query.order_by(User.date_created, User.id)
+
 @app.route('/api/users')
 def api_users():
-    all_users = User.query.all()
-    users_list = [{
-        'id': user.id,
-        'username': user.username,
-        'email': user.email,
-        'date_created': user.date_created.strftime('%Y-%m-%d %H:%M:%S')
-    } for user in all_users]
-    return jsonify(users_list)
+    cursor = request.args.get('cursor')
+    try:
+        query = users_after(cursor)
+        limit = min(int(request.args.get('limit', API_PAGE_SIZE)), API_MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({'error': 'invalid cursor or limit'}), 400
+
+    if request.args.get('format') == 'ndjson':
+        # One JSON object per line, fetched from a server-side cursor in
+        # batches: exporting the whole table runs in constant memory.
+        def generate():
+            rows = db.session.execute(query.execution_options(yield_per=API_STREAM_BATCH))
+            for row in rows:
+                yield json.dumps(user_to_dict(row)) + '\n'
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    if limit < 1:
+        return jsonify({'error': 'limit must be at least 1'}), 400
+    rows = db.session.execute(query.limit(limit + 1)).all()
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return jsonify({
+        'users': [user_to_dict(row) for row in rows[:limit]],
+        'next_cursor': next_cursor
+    })
+
+# Bulk import: rows are validated and checked against the unique keys one
+# batch at a time, inserted with a single executemany and committed per
+# batch. Rows that conflict are reported and skipped, the rest go in.
+IMPORT_BATCH_SIZE = 500
+IMPORT_FORMATS = {'text/csv': 'csv', 'application/x-ndjson': 'ndjson'}
+
+def read_csv_rows(lines):
+    for row in csv.DictReader(lines):
+        yield row
+
+def read_ndjson_rows(lines):
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield row if isinstance(row, dict) else {'_error': 'invalid JSON object'}
+
+def validate_user_row(row):
+    if '_error' in row:
+        return row['_error']
+    username, email = row.get('username'), row.get('email')
+    if not all(value is None or isinstance(value, str) for value in (username, email)):
+        return 'username and email must be strings'
+    username, email = (username or '').strip(), (email or '').strip()
+    if not username or not email:
+        return 'username and email are required'
+    try:
+        # Input is decoded with surrogateescape: undecodable bytes end up here
+        (username + email).encode('utf-8')
+    except UnicodeEncodeError:
+        return 'username or email is not valid UTF-8'
+    if len(username) > 80 or len(email) > 120:
+        return 'username or email too long'
+    if '@' not in email:
+        return 'invalid email'
+    return None
+
+def insert_user_batch(batch, report):
+    # batch: (row number, username, email) tuples, unique within the batch
+    names = [username for _, username, _ in batch]
+    emails = [email for _, _, email in batch]
+    taken = db.session.execute(
+        db.select(User.username, User.email).where(db.or_(User.username.in_(names), User.email.in_(emails)))
+    ).all()
+    taken_names = {username for username, _ in taken}
+    taken_emails = {email for _, email in taken}
+
+    rows = []
+    for line, username, email in batch:
+        if username in taken_names:
+            report['conflicts'].append({'row': line, 'username': username, 'error': 'username already exists'})
+        elif email in taken_emails:
+            report['conflicts'].append({'row': line, 'email': email, 'error': 'email already exists'})
+        else:
+            rows.append({'username': username, 'email': email})
+    if not rows:
+        return
+    try:
+        db.session.execute(db.insert(User), rows)
+        # Bulk inserts bypass the ORM events that maintain the counters
+        adjust_stat(db.session.connection(), 'total_users', len(rows))
+        db.session.commit()
+        report['inserted'] += len(rows)
+    except IntegrityError:
+        # A concurrent writer took a key since the check: retry row by row
+        db.session.rollback()
+        for line, username, email in batch:
+            if username in taken_names or email in taken_emails:
+                continue
+            try:
+                with db.session.begin_nested():
+                    db.session.add(User(username=username, email=email))
+                report['inserted'] += 1
+            except IntegrityError:
+                report['conflicts'].append({'row': line, 'username': username, 'email': email,
+                                            'error': 'username or email already exists'})
+        db.session.commit()
+
+def import_users(rows, batch_size=IMPORT_BATCH_SIZE):
+    report = {'inserted': 0, 'conflicts': [], 'errors': []}
+    batch, names, emails = [], set(), set()
+    for line, row in enumerate(rows, start=1):
+        error = validate_user_row(row)
+        if error:
+            report['errors'].append({'row': line, 'error': error})
+            continue
+        username, email = row['username'].strip(), row['email'].strip()
+        if username in names or email in emails:
+            report['conflicts'].append({'row': line, 'username': username, 'email': email,
+                                        'error': 'duplicate within the batch'})
+            continue
+        batch.append((line, username, email))
+        names.add(username)
+        emails.add(email)
+        if len(batch) >= batch_size:
+            insert_user_batch(batch, report)
+            batch, names, emails = [], set(), set()
+    if batch:
+        insert_user_batch(batch, report)
+    report['rows'] = report['inserted'] + len(report['conflicts']) + len(report['errors'])
+    return report
+
+def user_rows(lines, fmt):
+    return read_csv_rows(lines) if fmt == 'csv' else read_ndjson_rows(lines)
+
+@app.route('/api/users/bulk', methods=['POST'])
+def api_users_bulk_import():
+    fmt = request.args.get('format') or IMPORT_FORMATS.get(request.mimetype)
+    if fmt not in ('csv', 'ndjson'):
+        return jsonify({'error': 'send text/csv or application/x-ndjson, or pass format=csv|ndjson'}), 415
+    # Read the request body line by line, never as one string. Invalid
+    # UTF-8 is kept as surrogates and reported by validate_user_row.
+    lines = (line.decode('utf-8', 'surrogateescape') for line in request.stream)
+    report = import_users(user_rows(lines, fmt))
+    return jsonify(report)
+
+@app.route('/api/users/bulk')
+def api_users_bulk_export():
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in ('csv', 'ndjson'):
+        return jsonify({'error': 'format must be csv or ndjson'}), 400
+    query = users_after().execution_options(yield_per=API_STREAM_BATCH)
+
+    def generate():
+        if fmt == 'ndjson':
+            for row in db.session.execute(query):
+                yield json.dumps(user_to_dict(row)) + '\n'
+            return
+        out = io.StringIO()
+        writer = csv.writer(out)
+
+        def take():
+            data = out.getvalue()
+            out.seek(0)
+            out.truncate()
+            return data
+
+        # The header goes out even when there are no users
+        writer.writerow(['id', 'username', 'email', 'date_created'])
+        yield take()
+        for row in db.session.execute(query):
+            writer.writerow(user_to_dict(row).values())
+            yield take()
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    return Response(stream_with_context(generate()), mimetype=mimetype)
+
+@app.cli.command('import-users')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']),
+              help='Input format (default: from the file extension)')
+@click.option('--batch-size', default=IMPORT_BATCH_SIZE, show_default=True)
+def import_users_command(path, fmt, batch_size):
+    """Import users from a CSV (username,email header) or NDJSON file."""
+    fmt = fmt or ('csv' if path.endswith('.csv') else 'ndjson')
+    with open(path, encoding='utf-8', errors='surrogateescape', newline='') as lines:
+        report = import_users(user_rows(lines, fmt), batch_size=batch_size)
+    for item in report['conflicts'] + report['errors']:
+        click.echo(f"row {item['row']}: {item['error']}", err=True)
+    click.echo(f"{report['inserted']} users imported, {len(report['conflicts'])} conflicts, "
+               f"{len(report['errors'])} invalid rows")
 
 @app.route('/api/stats')
 def api_stats():
-    stats = {
-        'total_users': User.query.count(),
-        'total_messages': Contact.query.count(),
-        'timestamp': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
-    }
+    stats = get_stats()
+    stats['timestamp'] = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
     return jsonify(stats)
 
 @app.errorhandler(404)
@@ -129,4 +451,6 @@ def not_found(error):
     return render_template('404.html', title='404 - Page Not Found'), 404
 
 if __name__ == '__main__':
+    with app.app_context():
+        init_db()
     app.run(host='0.0.0.0', port=5000, debug=True)
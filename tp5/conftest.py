@@ -0,0 +1,27 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Add the project root to sys.path
+sys.path.insert(0, str(Path(__file__).parent))
+# app.py reads DATABASE_URL on import: point it at a throwaway SQLite file
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'test.db')
+
+from app import app, db, init_db  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    with app.app_context():
+        db.drop_all()
+        init_db()
+    return app.test_client()
+
+
+@pytest.fixture
+def ctx(client):
+    with app.app_context():
+        yield
@@ -0,0 +1,131 @@
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+from app import (MIGRATIONS, SchemaMigration, Stat, User, app, db, decode_cursor, encode_cursor, get_stats,
+                 init_db, upgrade_schema)
+
+T0 = datetime(2025, 1, 1, 12, 0, 0)
+
+
+def add_users(*dates):
+    users = [User(username=f'u{i}', email=f'u{i}@x', date_created=d) for i, d in enumerate(dates)]
+    db.session.add_all(users)
+    db.session.commit()
+    return [u.username for u in sorted(users, key=lambda u: (u.date_created, u.id))]
+
+
+# Keyset pagination
+
+def test_pages_follow_the_cursor_through_equal_dates(client, ctx):
+    later = T0.replace(hour=13)
+    expected = add_users(later, T0, T0, later, T0)
+    names, cursor = [], None
+    while True:
+        page = client.get('/api/users', query_string={'limit': 2, 'cursor': cursor or ''}).get_json()
+        names += [u['username'] for u in page['users']]
+        assert len(page['users']) <= 2
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert names == expected
+
+
+def test_cursor_round_trip(client, ctx):
+    add_users(T0)
+    row = db.session.execute(db.select(User.id, User.date_created)).one()
+    assert decode_cursor(encode_cursor(row)) == (T0, row.id)
+
+
+def test_invalid_cursor_or_limit_is_a_400(client):
+    bad_cursor = base64.urlsafe_b64encode(b'no-separator').decode()
+    for args in ({'cursor': '%%%'}, {'cursor': bad_cursor}, {'limit': 'ten'}, {'limit': 0}):
+        response = client.get('/api/users', query_string=args)
+        assert response.status_code == 400, args
+        assert 'error' in response.get_json()
+
+
+def test_ndjson_streams_every_user_after_the_cursor(client, ctx):
+    expected = add_users(T0, T0.replace(hour=13), T0.replace(hour=14))
+    response = client.get('/api/users?format=ndjson')
+    assert response.mimetype == 'application/x-ndjson'
+    assert [json.loads(line)['username'] for line in response.data.splitlines()] == expected
+
+    cursor = client.get('/api/users?limit=1').get_json()['next_cursor']
+    rest = client.get('/api/users', query_string={'format': 'ndjson', 'cursor': cursor})
+    assert [json.loads(line)['username'] for line in rest.data.splitlines()] == expected[1:]
+
+
+# Counters
+
+def test_counters_follow_inserts_deletes_and_rollbacks(client, ctx):
+    assert get_stats() == {'total_users': 0, 'total_messages': 0}
+    client.post('/users/add', data={'username': 'ann', 'email': 'ann@x'})
+    client.post('/users/add', data={'username': 'bob', 'email': 'bob@x'})
+    client.post('/contact', data={'name': 'ann', 'email': 'ann@x', 'message': 'hi'})
+    assert get_stats() == {'total_users': 2, 'total_messages': 1}
+
+    # A rejected insert rolls its counter update back with it
+    client.post('/users/add', data={'username': 'ann', 'email': 'other@x'})
+    assert get_stats()['total_users'] == 2
+
+    bob = db.session.scalar(db.select(User.id).where(User.username == 'bob'))
+    client.get(f'/users/delete/{bob}')
+    assert get_stats()['total_users'] == 1
+    assert client.get('/api/stats').get_json()['total_users'] == 1
+
+
+def test_init_db_seeds_missing_counters_from_the_tables(client, ctx):
+    add_users(T0, T0)
+    db.session.execute(db.delete(Stat))
+    db.session.commit()
+    init_db()
+    assert get_stats() == {'total_users': 2, 'total_messages': 0}
+
+
+# add_user conflicts
+
+def test_add_user_words_the_conflict(client):
+    client.post('/users/add', data={'username': 'ann', 'email': 'ann@x'})
+    page = client.post('/users/add', data={'username': 'ann', 'email': 'new@x'}, follow_redirects=True)
+    assert b'Username ann already exists!' in page.data
+    page = client.post('/users/add', data={'username': 'bob', 'email': 'ann@x'}, follow_redirects=True)
+    assert b'Email ann@x already exists!' in page.data
+    page = client.post('/users/add', data={'username': 'bob', 'email': ''}, follow_redirects=True)
+    assert b'Username and email are required!' in page.data
+
+
+# Schema setup
+
+def test_migrations_run_once_and_restore_missing_indexes(client, ctx):
+    applied = set(db.session.scalars(db.select(SchemaMigration.id)))
+    assert applied == {migration_id for migration_id, _ in MIGRATIONS}
+
+    db.session.execute(text('DROP INDEX ix_user_date_created'))
+    db.session.commit()
+    upgrade_schema()  # already recorded: not run again
+    assert 'ix_user_date_created' not in {ix['name'] for ix in inspect(db.engine).get_indexes('user')}
+
+    db.session.execute(db.delete(SchemaMigration))
+    db.session.commit()
+    upgrade_schema()
+    assert 'ix_user_date_created' in {ix['name'] for ix in inspect(db.engine).get_indexes('user')}
+    assert 'ix_contact_date_sent' in {ix['name'] for ix in inspect(db.engine).get_indexes('contact')}
+
+
+def test_init_db_command(client):
+    result = app.test_cli_runner().invoke(args=['init-db'])
+    assert result.exit_code == 0
+    assert 'Database initialized.' in result.output
+
+
+def test_sqlite_connections_get_the_pragmas(client, ctx):
+    with db.engine.connect() as connection:
+        def pragma(name):
+            return connection.execute(text(f'PRAGMA {name}')).scalar()
+        assert pragma('journal_mode') == 'wal'
+        assert pragma('synchronous') == 1  # NORMAL
+        assert pragma('busy_timeout') == 5000
+    assert app.config['SQLALCHEMY_ENGINE_OPTIONS']['pool_pre_ping'] is True
@@ -0,0 +1,113 @@
+import json
+
+from sqlalchemy import Select
+
+from app import User, app, db, get_stats, import_users
+
+
+def users():
+    return [(u.username, u.email) for u in db.session.scalars(db.select(User).order_by(User.id))]
+
+
+def test_csv_import_reports_conflicts_and_invalid_rows(client, ctx):
+    db.session.add(User(username='taken', email='taken@x'))
+    db.session.commit()
+    body = ('username,email\n'
+            'ann,ann@x\n'
+            'taken,other@x\n'
+            'bob,taken@x\n'
+            'ann,ann2@x\n'
+            'carl,\n'
+            'dan,no-at-sign\n'
+            ' eve ,eve@x\n')
+    report = client.post('/api/users/bulk', data=body, content_type='text/csv').get_json()
+
+    assert report['inserted'] == 2
+    assert sorted((c['row'], c['error']) for c in report['conflicts']) == [
+        (2, 'username already exists'), (3, 'email already exists'), (4, 'duplicate within the batch')]
+    assert [(e['row'], e['error']) for e in report['errors']] == [
+        (5, 'username and email are required'), (6, 'invalid email')]
+    assert report['rows'] == 7
+    assert users() == [('taken', 'taken@x'), ('ann', 'ann@x'), ('eve', 'eve@x')]
+    assert get_stats()['total_users'] == 3
+
+
+def test_ndjson_import_reports_bad_lines_per_row(client, ctx):
+    body = (b'{"username": "ann", "email": "ann@x"}\n'
+            b'{"username": 1, "email": "q@x"}\n'
+            b'not json\n'
+            b'\n'
+            b'["ann", "ann@x"]\n'
+            b'{"username": "b\xffd", "email": "b@x"}\n'
+            b'{"username": "bob", "email": "bob@x"}\n')
+    report = client.post('/api/users/bulk?format=ndjson', data=body).get_json()
+
+    assert report['inserted'] == 2
+    assert [e['error'] for e in report['errors']] == [
+        'username and email must be strings', 'invalid JSON object', 'invalid JSON object',
+        'username or email is not valid UTF-8']
+    assert users() == [('ann', 'ann@x'), ('bob', 'bob@x')]
+
+
+def test_import_needs_a_known_format(client):
+    response = client.post('/api/users/bulk', data='x', content_type='text/plain')
+    assert response.status_code == 415
+
+
+def test_batches_are_committed_and_counted(client, ctx):
+    rows = [{'username': f'u{i}', 'email': f'u{i}@x'} for i in range(7)]
+    report = import_users(rows + [{'username': 'u1', 'email': 'new@x'}], batch_size=3)
+
+    assert report['inserted'] == 7
+    assert report['conflicts'] == [{'row': 8, 'username': 'u1', 'error': 'username already exists'}]
+    assert get_stats()['total_users'] == db.session.scalar(db.select(db.func.count()).select_from(User)) == 7
+
+
+def test_concurrent_conflict_falls_back_to_row_by_row_inserts(client, ctx, monkeypatch):
+    db.session.add(User(username='taken', email='taken@x'))
+    db.session.commit()
+    # Hide existing keys from the pre-check, as if another writer inserted
+    # them in between: the batch INSERT then hits the unique constraint.
+    execute = db.session.execute
+
+    def blind_execute(statement, *args, **kwargs):
+        if isinstance(statement, Select):
+            statement = statement.where(db.false())
+        return execute(statement, *args, **kwargs)
+
+    monkeypatch.setattr(db.session, 'execute', blind_execute)
+    report = import_users([{'username': 'ann', 'email': 'ann@x'},
+                           {'username': 'taken', 'email': 'new@x'},
+                           {'username': 'bob', 'email': 'bob@x'}])
+    monkeypatch.undo()
+
+    assert report['inserted'] == 2
+    assert [(c['row'], c['error']) for c in report['conflicts']] == [(2, 'username or email already exists')]
+    assert users() == [('taken', 'taken@x'), ('ann', 'ann@x'), ('bob', 'bob@x')]
+    assert get_stats()['total_users'] == 3
+
+
+def test_export_round_trips_and_sends_the_csv_header_when_empty(client, ctx):
+    empty = client.get('/api/users/bulk?format=csv')
+    assert empty.mimetype == 'text/csv'
+    assert empty.data == b'id,username,email,date_created\r\n'
+    assert client.get('/api/users/bulk').data == b''
+    assert client.get('/api/users/bulk?format=xml').status_code == 400
+
+    import_users([{'username': f'u{i}', 'email': f'u{i}@x'} for i in range(3)])
+    lines = client.get('/api/users/bulk?format=csv').data.decode().splitlines()
+    assert lines[0] == 'id,username,email,date_created'
+    assert [line.split(',')[1:3] for line in lines[1:]] == [['u0', 'u0@x'], ['u1', 'u1@x'], ['u2', 'u2@x']]
+    rows = [json.loads(line) for line in client.get('/api/users/bulk?format=ndjson').data.splitlines()]
+    assert [row['username'] for row in rows] == ['u0', 'u1', 'u2']
+
+
+def test_import_users_command(client, ctx, tmp_path):
+    path = tmp_path / 'users.csv'
+    path.write_text('username,email\nann,ann@x\nann,ann2@x\n')
+    result = app.test_cli_runner().invoke(args=['import-users', str(path), '--batch-size', '1'])
+
+    assert result.exit_code == 0
+    assert '1 users imported, 1 conflicts, 0 invalid rows' in result.output
+    assert 'row 2: username already exists' in result.output
+    assert get_stats()['total_users'] == 1
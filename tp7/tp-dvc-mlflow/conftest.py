@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Add the project root to sys.path
+sys.path.insert(0, str(Path(__file__).parent))
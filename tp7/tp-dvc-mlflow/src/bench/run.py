@@ -0,0 +1,171 @@
+"""Benchmark the pipeline stages on synthetic data at scaled sizes.
+
+For every scale a scratch project is laid out under `bench.workdir`: a
+copy of `params.yaml` (stage cache and sweep disabled) and a synthetic raw
+file of `scale * base_rows` rows. Each stage then runs there as a
+subprocess, exactly as `dvc repro` would run it, and its
+`reports/perf/<stage>.json` (see `src.data.perf`) supplies wall time, CPU
+time, peak RSS and rows. Results go to `reports/bench/latest.json` and are
+compared with the stored baseline; a stage that got slower or bigger than
+`tolerance` allows is reported as a regression (exit code 1).
+
+    python -m src.bench.run                    # scales from params.yaml
+    python -m src.bench.run --scales 1 10 --save-baseline
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import yaml
+
+from src.bench.synthetic import read_sample, write_raw
+
+ROOT = Path(__file__).resolve().parents[2]
+
+STAGES = {
+    "preprocess": ["-m", "src.data.preprocess"],
+    "split": ["-m", "src.data.split"],
+    "train": ["-m", "src.train.train"],
+    "predict": ["-m", "src.infer.predict"],
+}
+# Step whose row count is the stage's workload.
+ROWS_STEP = {"preprocess": "read", "split": "read", "train": "fit", "predict": "score"}
+
+def load_params(path: str = "params.yaml") -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+def bench_params(params: dict) -> dict:
+    """params.yaml for a scratch run: no stage cache, no sweep, no mirror."""
+    out = json.loads(json.dumps(params))
+    out.setdefault("cache", {})["enabled"] = False
+    out.setdefault("sweep", {})["enabled"] = False
+    out["dataset"]["mirror"] = None
+    return out
+
+def run_stage(stage: str, workdir: Path) -> dict:
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")]))}
+    log_path = workdir / "logs" / f"{stage}.log"
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(log_path, "w", encoding="utf-8") as log:
+        proc = subprocess.run([sys.executable, *STAGES[stage]], cwd=workdir, env=env,
+                              stdout=log, stderr=subprocess.STDOUT)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{stage} failed in {workdir}, see {log_path}")
+
+    with open(workdir / "reports" / "perf" / f"{stage}.json", "r", encoding="utf-8") as f:
+        report = json.load(f)
+    total = report["total"]
+    rows = report.get(ROWS_STEP[stage], {}).get("rows", 0)
+    return {
+        "rows": rows,
+        "wall_s": total["wall_s"],
+        "cpu_s": total["cpu_s"],
+        "peak_rss_mb": total["peak_rss_mb"],
+        "rows_per_s": round(rows / total["wall_s"], 1) if total["wall_s"] > 0 else 0.0,
+    }
+
+def run_scale(scale: int, params: dict, cfg: dict, stages: list[str], sample) -> dict:
+    workdir = Path(cfg.get("workdir", ".cache/bench")) / f"x{scale}"
+    shutil.rmtree(workdir, ignore_errors=True)
+    workdir.mkdir(parents=True)
+    with open(workdir / "params.yaml", "w", encoding="utf-8") as f:
+        yaml.safe_dump(bench_params(params), f, sort_keys=False)
+
+    n_rows = scale * int(cfg.get("base_rows", 32561))
+    raw = workdir / "data" / "raw" / params["dataset"]["raw_filename"]
+    write_raw(sample, raw, n_rows, seed=int(params["seed"]) + scale)
+    print(f"[bench] x{scale}: {n_rows} synthetic rows -> {raw}")
+
+    results = {}
+    for stage in stages:
+        results[stage] = run_stage(stage, workdir)
+        r = results[stage]
+        print(f"[bench] x{scale} {stage:<10} {r['wall_s']:8.2f}s {r['rows_per_s']:>12.0f} rows/s "
+              f"{r['peak_rss_mb']:8.0f} MB")
+    return results
+
+def scaling_exponents(results: dict) -> dict:
+    """Slope of log(wall) vs log(rows) between the smallest and largest scale (1.0 = linear)."""
+    scales = sorted(results, key=lambda k: int(k.lstrip("x")))
+    out = {}
+    if len(scales) < 2:
+        return out
+    lo, hi = results[scales[0]], results[scales[-1]]
+    for stage in lo:
+        a, b = lo[stage], hi.get(stage)
+        if b and a["rows"] and b["rows"] > a["rows"] and a["wall_s"] > 0:
+            out[stage] = round(math.log(b["wall_s"] / a["wall_s"]) / math.log(b["rows"] / a["rows"]), 3)
+    return out
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Regressions of wall time or peak RSS beyond `tolerance` vs `baseline`."""
+    regressions = []
+    for scale, stages in results.items():
+        for stage, r in stages.items():
+            base = baseline.get(scale, {}).get(stage)
+            if base is None:
+                continue
+            for metric in ("wall_s", "peak_rss_mb"):
+                if base[metric] > 0 and r[metric] > base[metric] * (1 + tolerance):
+                    regressions.append(
+                        f"{scale} {stage} {metric}: {r[metric]:.2f} vs baseline {base[metric]:.2f} "
+                        f"(+{100 * (r[metric] / base[metric] - 1):.0f}%)"
+                    )
+    return regressions
+
+def main() -> None:
+    params = load_params()
+    cfg = params.get("bench", {})
+
+    parser = argparse.ArgumentParser(description="Benchmark pipeline stages on scaled synthetic data")
+    parser.add_argument("--scales", type=int, nargs="+", default=cfg.get("scales", [1, 10, 100]))
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=cfg.get("stages", list(STAGES)))
+    parser.add_argument("--baseline", default=cfg.get("baseline", "reports/bench/baseline.json"))
+    parser.add_argument("--tolerance", type=float, default=float(cfg.get("tolerance", 0.25)))
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    args = parser.parse_args()
+
+    sample_path = Path(cfg.get("sample", "data/raw/adult.csv"))
+    if not sample_path.exists():
+        sample_path = Path("data/raw") / params["dataset"]["raw_filename"]
+    sample = read_sample(sample_path)
+
+    results = {f"x{scale}": run_scale(scale, params, cfg, args.stages, sample) for scale in args.scales}
+    report = {"results": results, "scaling_exponent": scaling_exponents(results)}
+
+    out_path = Path("reports/bench/latest.json")
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print("[bench] scaling exponent (1.0 = linear):", report["scaling_exponent"])
+    print("[bench] saved results to", out_path)
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(out_path, baseline_path)
+        print("[bench] saved baseline to", baseline_path)
+        return
+    if not baseline_path.exists():
+        print("[bench] no baseline at", baseline_path, "- rerun with --save-baseline to store one")
+        return
+
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.tolerance)
+    for line in regressions:
+        print("[bench] REGRESSION", line)
+    if regressions:
+        sys.exit(1)
+    print(f"[bench] no regression beyond {args.tolerance:.0%} of", baseline_path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Synthetic adult-schema raw data for benchmarks.
+
+Rows are bootstrapped from a real sample, so category frequencies, missing
+markers and feature/label correlations match the dataset. `age` and
+`fnlwgt` are jittered so scaled-up files are not mostly exact duplicates,
+which would let the dedupe step shrink the workload. The output is written
+the way `download` stores it: headerless CSV with `COLUMNS`.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+from src.data.download import COLUMNS
+
+CHUNK_ROWS = 200_000
+
+
+def read_sample(path: str | Path) -> pd.DataFrame:
+    """Load a raw sample, with or without the header line."""
+    with open(path, "r", encoding="utf-8") as f:
+        has_header = f.readline().startswith(COLUMNS[0] + ",")
+    return pd.read_csv(path, header=0 if has_header else None, names=COLUMNS)
+
+
+def synthesize(sample: pd.DataFrame, n_rows: int, seed: int, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    rng = np.random.default_rng(seed)
+    for start in range(0, n_rows, chunk_rows):
+        n = min(chunk_rows, n_rows - start)
+        rows = sample.iloc[rng.integers(len(sample), size=n)].reset_index(drop=True)
+        rows["age"] = np.clip(rows["age"] + rng.integers(-2, 3, size=n), 17, 90)
+        rows["fnlwgt"] = np.rint(rows["fnlwgt"] * rng.uniform(0.9, 1.1, size=n)).astype(np.int64)
+        yield rows
+
+
+def write_raw(sample: pd.DataFrame, out_path: str | Path, n_rows: int, seed: int) -> Path:
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, "w", encoding="utf-8", newline="") as f:
+        for chunk in synthesize(sample, n_rows, seed):
+            chunk.to_csv(f, header=False, index=False)
+    return out_path
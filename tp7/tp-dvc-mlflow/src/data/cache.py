@@ -0,0 +1,105 @@
+"""Content-addressed cache for stage outputs outside `dvc repro`.
+
+An entry is keyed on the sha256 of the stage inputs, the relevant
+`params.yaml` sections and the source of the code that produced it, and
+holds a copy of every output file. Entries are evicted least recently used
+first once the cache grows past `max_size_mb`.
+"""
+from __future__ import annotations
+
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+from src.data.storage import file_sha256
+
+META_FILE = "meta.json"
+
+
+class StageCache:
+    def __init__(self, root: str | Path = ".cache/stages", max_size_mb: float = 2048, enabled: bool = True) -> None:
+        self.root = Path(root)
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.enabled = enabled
+
+    @classmethod
+    def from_params(cls, params: dict) -> "StageCache":
+        cfg = params.get("cache", {})
+        return cls(
+            root=cfg.get("dir", ".cache/stages"),
+            max_size_mb=float(cfg.get("max_size_mb", 2048)),
+            enabled=bool(cfg.get("enabled", True)),
+        )
+
+    def key(self, stage: str, inputs: list, params: dict, code: list) -> str:
+        """Entry key; `code` items are paths or modules/classes/functions."""
+        code_paths = [p if isinstance(p, (str, Path)) else inspect.getsourcefile(p) for p in code]
+        payload = {
+            "stage": stage,
+            "inputs": {str(p): file_sha256(p) for p in inputs},
+            "params": params,
+            "code": {Path(p).name: file_sha256(p) for p in code_paths},
+        }
+        blob = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(blob).hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def restore(self, key: str, outputs: list) -> bool:
+        """Copy a cached entry back to `outputs`; False on a miss."""
+        if not self.enabled:
+            return False
+        entry = self._entry(key)
+        meta_path = entry / META_FILE
+        if not meta_path.exists():
+            return False
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if sorted(meta["outputs"]) != sorted(str(p) for p in outputs):
+            return False
+        for i, out in enumerate(meta["outputs"]):
+            dest = Path(out)
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(entry / str(i), dest)
+        now = time.time()
+        os.utime(meta_path, (now, now))
+        return True
+
+    def store(self, key: str, outputs: list) -> None:
+        if not self.enabled:
+            return
+        entry = self._entry(key)
+        tmp = entry.with_name(f"{key}.tmp-{os.getpid()}")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        size = 0
+        for i, out in enumerate(outputs):
+            shutil.copy2(out, tmp / str(i))
+            size += Path(out).stat().st_size
+        with open(tmp / META_FILE, "w", encoding="utf-8") as f:
+            json.dump({"outputs": [str(p) for p in outputs], "size": size}, f, indent=2)
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(tmp, entry)
+        self.evict()
+
+    def evict(self) -> list[str]:
+        """Drop least recently used entries until the cache fits `max_bytes`."""
+        entries = []
+        for meta_path in self.root.glob(f"*/*/{META_FILE}"):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                size = json.load(f)["size"]
+            entries.append((meta_path.stat().st_mtime, size, meta_path.parent))
+        total = sum(size for _, size, _ in entries)
+        evicted = []
+        for _, size, entry in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            evicted.append(entry.name)
+        return evicted
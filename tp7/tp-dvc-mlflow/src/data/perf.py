@@ -0,0 +1,200 @@
+"""Per-stage timing and memory reports for the pipeline.
+
+`profiled("preprocess")` wraps a stage `main()`. Inside it, every
+`with step("read") as s:` block records wall time, CPU time (including
+finished worker processes), peak RSS and, when the block sets `s.rows` /
+`s.bytes`, throughput. Re-entering a step name (one block per chunk)
+accumulates into the same entry. The report is written to
+`reports/perf/<stage>.json` for `dvc metrics diff`; `log_mlflow` adds the
+reports to the active MLflow run.
+
+Peak RSS is per step on Linux (VmHWM is reset through
+`/proc/self/clear_refs` when a step starts); elsewhere it is the process
+high-water mark so far.
+"""
+from __future__ import annotations
+
+import functools
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator
+
+PERF_DIR = Path("reports/perf")
+
+_ACTIVE: "StageProfiler | None" = None
+
+
+def _peak_rss_mb() -> float:
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, KiB on Linux.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _reset_peak_rss() -> None:
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _cpu_s() -> float:
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+class Step:
+    """Counters a `step` block may fill in."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.rows: int | None = None
+        self.bytes: int | None = None
+        self.peak_rss_mb = 0.0
+
+
+class StageProfiler:
+    def __init__(self, stage: str, out_dir: str | Path | None = None) -> None:
+        self.stage = stage
+        self.path = Path(out_dir or PERF_DIR) / f"{stage}.json"
+        self.steps: dict[str, dict] = {}
+        self._open: list[Step] = []
+
+    @contextmanager
+    def step(self, name: str) -> Iterator[Step]:
+        # Hand the high-water mark so far to the enclosing steps before
+        # resetting it for this one.
+        peak = _peak_rss_mb()
+        for outer in self._open:
+            outer.peak_rss_mb = max(outer.peak_rss_mb, peak)
+        _reset_peak_rss()
+
+        rec = Step(name)
+        self._open.append(rec)
+        wall0, cpu0 = time.perf_counter(), _cpu_s()
+        try:
+            yield rec
+        finally:
+            wall, cpu = time.perf_counter() - wall0, _cpu_s() - cpu0
+            self._open.pop()
+            rec.peak_rss_mb = max(rec.peak_rss_mb, _peak_rss_mb())
+            for outer in self._open:
+                outer.peak_rss_mb = max(outer.peak_rss_mb, rec.peak_rss_mb)
+            self._record(rec, wall, cpu)
+
+    def _record(self, rec: Step, wall: float, cpu: float) -> None:
+        agg = self.steps.setdefault(rec.name, {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "peak_rss_mb": 0.0})
+        agg["calls"] += 1
+        agg["wall_s"] += wall
+        agg["cpu_s"] += cpu
+        agg["peak_rss_mb"] = max(agg["peak_rss_mb"], rec.peak_rss_mb)
+        for counter in ("rows", "bytes"):
+            value = getattr(rec, counter)
+            if value is not None:
+                agg[counter] = agg.get(counter, 0) + int(value)
+
+    def report(self) -> dict:
+        out = {}
+        for name, agg in self.steps.items():
+            entry = {k: round(v, 4) if isinstance(v, float) else v for k, v in agg.items()}
+            if agg["wall_s"] > 0:
+                for counter in ("rows", "bytes"):
+                    if counter in agg:
+                        entry[f"{counter}_per_s"] = round(agg[counter] / agg["wall_s"], 1)
+            out[name] = entry
+        return out
+
+    def save(self) -> Path:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+        return self.path
+
+
+@contextmanager
+def step(name: str) -> Iterator[Step]:
+    """Profile a block in the active stage; a plain no-op outside one."""
+    if _ACTIVE is None:
+        yield Step(name)
+        return
+    with _ACTIVE.step(name) as rec:
+        yield rec
+
+
+def profile_iter(name: str, frames: Iterable) -> Iterator:
+    """Yield from `frames`, timing each `next()` and counting rows as `name`."""
+    it = iter(frames)
+    while True:
+        with step(name) as rec:
+            frame = next(it, None)
+            if frame is not None:
+                rec.rows = len(frame)
+        if frame is None:
+            return
+        yield frame
+
+
+def profiled(stage: str):
+    """Decorate a stage `main()` to write `reports/perf/<stage>.json`."""
+
+    def decorate(main):
+        @functools.wraps(main)
+        def run(*args, **kwargs):
+            global _ACTIVE
+            prof, previous = StageProfiler(stage), _ACTIVE
+            _ACTIVE = prof
+            try:
+                with prof.step("total"):
+                    result = main(*args, **kwargs)
+            finally:
+                _ACTIVE = previous
+            path = prof.save()
+            total = prof.steps["total"]
+            print(f"[{stage}] wall={total['wall_s']:.2f}s cpu={total['cpu_s']:.2f}s "
+                  f"peak_rss={total['peak_rss_mb']:.0f}MB, perf report: {path}")
+            return result
+
+        return run
+
+    return decorate
+
+
+def flatten(stage: str, report: dict) -> dict[str, float]:
+    return {
+        f"perf.{stage}.{name}.{field}": float(value)
+        for name, entry in report.items()
+        for field, value in entry.items()
+    }
+
+
+def log_mlflow(perf_dir: str | Path | None = None, logger=None) -> None:
+    """Log the saved stage reports and the active stage's steps so far.
+
+    `logger` is anything with MLflow's `log_metrics` (an
+    `src.train.tracking.AsyncLogger`); the active run by default.
+    """
+    import mlflow
+
+    metrics = {}
+    active = _ACTIVE.stage if _ACTIVE is not None else None
+    for path in sorted(Path(perf_dir or PERF_DIR).glob("*.json")):
+        if path.stem != active:
+            with open(path, "r", encoding="utf-8") as f:
+                metrics.update(flatten(path.stem, json.load(f)))
+    if _ACTIVE is not None:
+        metrics.update(flatten(active, _ACTIVE.report()))
+    if metrics:
+        (logger or mlflow).log_metrics(metrics)
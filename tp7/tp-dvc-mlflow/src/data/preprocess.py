@@ -6,41 +6,250 @@ import numpy as np
 import pandas as pd
 from sklearn.preprocessing import StandardScaler
 
+from src.data.cache import StageCache
+from src.data.download import COLUMNS, raw_file
+from src.data.perf import profile_iter, profiled, step
+from src.data.schema import CLEAN_DTYPES, RAW_DTYPES, apply_dtypes
+from src.data.state import PreprocessState, clean_columns, mark_missing
+from src.data.storage import (
+    FrameWriter,
+    data_path,
+    file_sha256,
+    iter_frames,
+    read_frame,
+    storage_config,
+    write_frame,
+)
+
+STATE_PATH = Path("data/processed/preprocess_state.json")
+DIGESTS_PATH = Path("data/processed/row_digests.npy")
+
 def load_params(path: str = "params.yaml") -> dict:
     with open(path, "r", encoding="utf-8") as f:
         return yaml.safe_load(f)
 
-def main() -> None:
-    params = load_params()
+def fit_params(cfg: dict) -> dict:
+    """Settings that change the fitted scaler statistics."""
+    return {k: bool(cfg[k]) for k in ("drop_duplicates", "drop_missing")}
+
+def row_digests(df: pd.DataFrame) -> np.ndarray:
+    """64-bit digest per row, as used for duplicate detection."""
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
 
-    raw_path = Path("data/raw") / params["dataset"]["raw_filename"]
-    out_dir = Path("data/processed")
-    out_dir.mkdir(parents=True, exist_ok=True)
-    out_path = out_dir / "adult_clean.csv"
+def save_digests(digests, path: Path) -> Path:
+    """Store the distinct raw-row digests, sorted, for incremental dedupe."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.save(path, np.unique(np.asarray(digests, dtype=np.uint64)))
+    return path
+
+def preprocess_delta(
+    df: pd.DataFrame,
+    cfg: dict,
+    state: PreprocessState,
+    seen: np.ndarray,
+) -> tuple[pd.DataFrame, np.ndarray]:
+    """Clean appended raw rows with a fitted `state`.
+
+    `seen` holds the sorted digests of the rows already processed; rows
+    matching them (or an earlier row of `df`) count as duplicates. Returns
+    the cleaned rows and the updated digests.
+    """
+    # Digests depend on the dtypes: hash the rows as preprocess reads them.
+    df = mark_missing(apply_dtypes(df, RAW_DTYPES), state.missing_values)
+    digests = row_digests(df)
+    if cfg["drop_duplicates"]:
+        _, first = np.unique(digests, return_index=True)
+        keep = np.zeros(len(df), dtype=bool)
+        keep[first] = True
+        keep &= ~np.isin(digests, seen)
+        df = df[keep]
+    if cfg["drop_missing"]:
+        df = df.dropna()
+    df = state.scale(df)
+    df.columns = clean_columns(df.columns)
+    return apply_dtypes(df, CLEAN_DTYPES), np.union1d(seen, digests)
 
-    df = pd.read_csv(raw_path)
+def preprocess_in_memory(
+    raw_path: Path,
+    out_path: Path,
+    fmt: str,
+    compression: str,
+    cfg: dict,
+    state: PreprocessState | None = None,
+    raw_names: list[str] | None = None,
+    digests_path: Path | None = None,
+) -> PreprocessState:
+    # With `raw_names` the raw file is the headerless csv from download.
+    with step("read") as s:
+        df = read_frame(raw_path, "csv" if raw_names else fmt, names=raw_names, dtype=RAW_DTYPES)
+        s.rows = len(df)
+    raw_columns = list(df.columns)
 
     # Remplacer ? par NaN
-    df.replace(" ?", np.nan, inplace=True)
+    with step("replace") as s:
+        df = mark_missing(df)
+        s.rows = len(df)
+    if digests_path is not None:
+        save_digests(row_digests(df), digests_path)
 
     # Drop duplicates si demandé
-    if params["preprocess"]["drop_duplicates"]:
-        df = df.drop_duplicates()
+    if cfg["drop_duplicates"]:
+        with step("dedupe") as s:
+            s.rows = len(df)
+            df = df.drop_duplicates()
 
     # Drop lignes avec NaN si demandé
-    if params["preprocess"]["drop_missing"]:
-        df = df.dropna()
+    if cfg["drop_missing"]:
+        with step("dropna") as s:
+            s.rows = len(df)
+            df = df.dropna()
 
-    # Normalisation des colonnes numériques
-    num_cols = df.select_dtypes(include="number").columns
-    scaler = StandardScaler()
-    df[num_cols] = scaler.fit_transform(df[num_cols])
+    # Normalisation des colonnes numériques (réutilise l'état s'il est à jour)
+    with step("scale") as s:
+        s.rows = len(df)
+        if state is None:
+            num_cols = df.select_dtypes(include="number").columns
+            # float64 statistics, whatever the storage dtype.
+            scaler = StandardScaler().fit(df[num_cols].to_numpy(dtype=np.float64))
+            state = PreprocessState.from_scaler(scaler, num_cols, raw_columns, params=fit_params(cfg))
+        df = state.scale(df)
 
     # Nettoyer les noms de colonnes
-    df.columns = [c.strip().lower().replace(" ", "_") for c in df.columns]
+    df.columns = clean_columns(df.columns)
+    df = apply_dtypes(df, CLEAN_DTYPES)
+
+    with step("write") as s:
+        write_frame(df, out_path, fmt, compression)
+        s.rows = len(df)
+    return state
+
+def preprocess_streaming(
+    raw_path: Path,
+    out_path: Path,
+    fmt: str,
+    compression: str,
+    cfg: dict,
+    state: PreprocessState | None = None,
+    raw_names: list[str] | None = None,
+    digests_path: Path | None = None,
+) -> PreprocessState:
+    """Two-pass, chunked version of `preprocess_in_memory`.
+
+    Pass 1 hashes each row to drop duplicates (64-bit digests kept in a set),
+    applies the missing-value filter and feeds the surviving rows to
+    `StandardScaler.partial_fit` (skipped when a fresh `state` is given).
+    The per-chunk keep masks are stored as packed bits so pass 2 only
+    re-reads, filters, scales and writes. Peak memory is one chunk plus the
+    digest set and the masks.
+    """
+    chunk_size = int(cfg.get("chunk_size", 100_000))
+    raw_fmt = "csv" if raw_names else fmt
+    scaler = StandardScaler()
+    seen: set[int] = set()
+    masks: list[tuple[np.ndarray, int]] = []
+    raw_columns = None
+    num_cols = None
+    n_in = 0
+
+    for chunk in profile_iter("read", iter_frames(raw_path, chunk_size, raw_fmt, names=raw_names, dtype=RAW_DTYPES)):
+        with step("replace") as s:
+            chunk = mark_missing(chunk)
+            s.rows = len(chunk)
+        if num_cols is None:
+            raw_columns = list(chunk.columns)
+            num_cols = chunk.select_dtypes(include="number").columns
+        n_in += len(chunk)
+
+        keep = np.ones(len(chunk), dtype=bool)
+        if cfg["drop_duplicates"] or digests_path is not None:
+            with step("dedupe") as s:
+                digests = row_digests(chunk)
+                for i, d in enumerate(digests.tolist()):
+                    if d in seen:
+                        keep[i] = not cfg["drop_duplicates"]
+                    else:
+                        seen.add(d)
+                s.rows = len(chunk)
+        if cfg["drop_missing"]:
+            with step("dropna") as s:
+                keep &= chunk.notna().all(axis=1).to_numpy()
+                s.rows = len(chunk)
+
+        if state is None and keep.any():
+            with step("fit") as s:
+                scaler.partial_fit(chunk.loc[keep, num_cols].to_numpy(dtype=np.float64))
+                s.rows = int(keep.sum())
+        masks.append((np.packbits(keep), len(keep)))
+
+    if state is None:
+        state = PreprocessState.from_scaler(scaler, num_cols, raw_columns, params=fit_params(cfg))
+    if digests_path is not None:
+        save_digests(np.fromiter(seen, dtype=np.uint64, count=len(seen)), digests_path)
+
+    with FrameWriter(out_path, fmt, compression) as writer:
+        frames = profile_iter("reread", iter_frames(raw_path, chunk_size, raw_fmt, names=raw_names, dtype=RAW_DTYPES))
+        for chunk, (packed, n) in zip(frames, masks):
+            keep = np.unpackbits(packed, count=n).astype(bool)
+            if not keep.any():
+                continue
+            with step("scale") as s:
+                chunk = state.scale(mark_missing(chunk.loc[keep]))
+                chunk.columns = clean_columns(chunk.columns)
+                chunk = apply_dtypes(chunk, CLEAN_DTYPES)
+                s.rows = len(chunk)
+            with step("write") as s:
+                writer.write(chunk)
+                s.rows = len(chunk)
+
+    print(f"[preprocess] streaming: {n_in} rows in, {writer.rows} rows out, chunk_size={chunk_size}")
+    return state
+
+@profiled("preprocess")
+def main(refit: bool = False) -> None:
+    """Run the stage; `refit` fits the scaler again even if the state is fresh."""
+    params = load_params()
+    fmt, compression = storage_config(params)
+    cfg = params["preprocess"]
+
+    raw_path = raw_file(params)
+    out_path = data_path("data/processed", "adult_clean", fmt)
+    outputs = [out_path, STATE_PATH, DIGESTS_PATH]
+
+    cache = StageCache.from_params(params)
+    key = cache.key(
+        "preprocess",
+        inputs=[raw_path],
+        params={"preprocess": cfg, "storage": params.get("storage", {})},
+        code=[__file__, PreprocessState, FrameWriter, apply_dtypes],
+    )
+    with step("restore"):
+        restored = cache.restore(key, outputs)
+    if restored:
+        print(f"[preprocess] restored cached outputs ({key[:12]})")
+        return
+
+    raw_sha256 = file_sha256(raw_path)
+    state = None
+    if STATE_PATH.exists() and not refit:
+        try:
+            previous = PreprocessState.load(STATE_PATH)
+        except ValueError as exc:
+            print("[preprocess] ignoring previous state:", exc)
+            previous = None
+        if previous is not None and previous.is_fresh(raw_sha256, fit_params(cfg)):
+            state = previous
+            print("[preprocess] raw data unchanged, reusing fitted state", STATE_PATH)
+
+    run = preprocess_streaming if cfg.get("streaming", False) else preprocess_in_memory
+    state = run(raw_path, out_path, fmt, compression, cfg, state=state,
+                raw_names=COLUMNS, digests_path=DIGESTS_PATH)
 
-    df.to_csv(out_path, index=False)
+    state.raw_sha256 = state.fit_sha256 = raw_sha256
+    state.raw_bytes = raw_path.stat().st_size
+    state.save(STATE_PATH)
+    cache.store(key, outputs)
     print("[preprocess] saved cleaned dataset to", out_path)
+    print("[preprocess] saved preprocessing state to", STATE_PATH)
 
 if __name__ == "__main__":
     main()
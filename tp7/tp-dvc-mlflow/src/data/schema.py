@@ -0,0 +1,37 @@
+"""Column dtypes of the adult dataset, shared by every stage.
+
+With pandas defaults the string columns load as Python objects and the
+numbers as int64/float64. The declared dtypes store each string column as
+a `category` (int8 codes plus one copy of each distinct value) and the
+numbers as float32, which cuts the in-memory frame several times and
+makes hashing (dedupe, hash split) and one-hot encoding work on codes
+instead of Python strings.
+
+- `RAW_DTYPES`: the downloaded file (`COLUMNS`). The counts are integers,
+  but float32 holds every one of them exactly (all are below 2**24) and,
+  unlike int16/int32, keeps a blank cell as NaN for `drop_missing`;
+- `CLEAN_DTYPES`: preprocess output and splits, with the numeric columns
+  standardized.
+
+Missing-value tokens such as " ?" stay ordinary categories until
+`mark_missing` removes them.
+"""
+from __future__ import annotations
+
+import pandas as pd
+
+from src.data.download import COLUMNS
+
+CATEGORICAL = [
+    "workclass", "education", "marital_status", "occupation", "relationship",
+    "race", "sex", "native_country", "income",
+]
+NUMERIC = ["age", "fnlwgt", "education_num", "capital_gain", "capital_loss", "hours_per_week"]
+RAW_DTYPES = {c: "float32" if c in NUMERIC else "category" for c in COLUMNS}
+CLEAN_DTYPES = dict(RAW_DTYPES)
+
+
+def apply_dtypes(df: pd.DataFrame, dtypes: dict = CLEAN_DTYPES) -> pd.DataFrame:
+    """`df` with the declared dtype on each of its columns `dtypes` names."""
+    todo = {c: t for c, t in dtypes.items() if c in df.columns and str(df[c].dtype) != t}
+    return df.astype(todo) if todo else df
@@ -2,8 +2,15 @@ from __future__ import annotations
 from pathlib import Path
 
 import yaml
+import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
+
+from src.data.cache import StageCache
+from src.data.perf import profiled, step
+from src.data.schema import CLEAN_DTYPES
+from src.data.storage import data_path, read_frame, storage_config, write_frame
+
+SPLITS = ("train", "val", "test")
 
 def load_params(path: str = "params.yaml") -> dict:
     with open(path, "r", encoding="utf-8") as f:
@@ -11,10 +18,57 @@ def load_params(path: str = "params.yaml") -> dict:
 
 def dist(series: pd.Series) -> dict:
     vc = series.value_counts(normalize=True)
-    return {str(k): float(v) for k, v in vc.items()}
-
+    return {str(k): float(v) for k, v in vc.items() if v > 0}
+
+def stratified_assign(labels: pd.Series, ratios: tuple[float, float, float], seed: int, stratify: bool = True) -> np.ndarray:
+    """Assign every row to 0=train, 1=val, 2=test in one vectorized pass.
+
+    Rows are shuffled once, stably grouped by class, and each class is cut
+    at round(ratio * class_size) so all three splits keep the class mix.
+    """
+    n = len(labels)
+    rng = np.random.default_rng(seed)
+    codes = pd.factorize(labels)[0] if stratify else np.zeros(n, dtype=np.int64)
+
+    perm = rng.permutation(n)
+    order = perm[np.argsort(codes[perm], kind="stable")]
+    sorted_codes = codes[order]
+
+    counts = np.bincount(sorted_codes)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    rank = np.arange(n) - starts[sorted_codes]
+
+    n_train = np.rint(counts * ratios[0]).astype(np.int64)
+    n_val = np.rint(counts * ratios[1]).astype(np.int64)
+    bucket = np.where(
+        rank < n_train[sorted_codes], 0, np.where(rank < (n_train + n_val)[sorted_codes], 1, 2)
+    ).astype(np.int8)
+
+    assign = np.empty(n, dtype=np.int8)
+    assign[order] = bucket
+    return assign
+
+def hashed_assign(df: pd.DataFrame, columns: list[str] | None, ratios: tuple[float, float, float], seed: int) -> np.ndarray:
+    """Deterministic assignment from a salted hash of `columns`.
+
+    A row always lands in the same split whatever else is in the file, so
+    appending rows never moves existing ones. Rows sharing the key values
+    stay together (grouped split). Defaults to the categorical columns:
+    scaled numerics shift whenever the scaler is refitted on new data.
+    """
+    if not columns:
+        columns = df.select_dtypes(include=["object", "category"]).columns.tolist()
+    keys = df[columns]
+    hash_key = f"{seed:016d}"[-16:]
+    h = pd.util.hash_pandas_object(keys, index=False, hash_key=hash_key).to_numpy()
+    u = (h >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+    bounds = np.cumsum(ratios)[:2]
+    return np.searchsorted(bounds, u, side="right").astype(np.int8)
+
+@profiled("split")
 def main() -> None:
     params = load_params()
+    fmt, compression = storage_config(params)
 
     seed = int(params["seed"])
     split_cfg = params["split"]
@@ -22,62 +76,63 @@ def main() -> None:
     val_ratio = float(split_cfg["val_ratio"])
     test_ratio = float(split_cfg["test_ratio"])
     stratify = bool(split_cfg.get("stratify", True))
+    method = split_cfg.get("method", "stratified")
 
     total = train_ratio + val_ratio + test_ratio
     if abs(total - 1.0) > 1e-9:
         raise ValueError(f"Split ratios must sum to 1.0, got {total}")
+    if method not in ("stratified", "hash"):
+        raise ValueError(f"Unknown split method {method!r}, expected 'stratified' or 'hash'")
 
-    in_path = Path("data/processed") / "adult_clean.csv"
-    df = pd.read_csv(in_path)
-
-    if "income" not in df.columns:
-        raise ValueError("Target column 'income' not found. Check preprocessing output.")
-
-    X = df.drop(columns=["income"])
-    y = df["income"]
-
-    X_train, X_temp, y_train, y_temp = train_test_split(
-        X,
-        y,
-        test_size=1.0 - train_ratio,
-        random_state=seed,
-        stratify=y if stratify else None,
-    )
-
-    val_ratio_adjusted = val_ratio / (val_ratio + test_ratio)
-    X_val, X_test, y_val, y_test = train_test_split(
-        X_temp,
-        y_temp,
-        test_size=1.0 - val_ratio_adjusted,
-        random_state=seed,
-        stratify=y_temp if stratify else None,
-    )
-
+    in_path = data_path("data/processed", "adult_clean", fmt)
     out_dir = Path("data/splits")
-    out_dir.mkdir(parents=True, exist_ok=True)
+    outputs = [data_path(out_dir, name, fmt) for name in SPLITS]
+
+    cache = StageCache.from_params(params)
+    key = cache.key(
+        "split",
+        inputs=[in_path],
+        params={"seed": seed, "split": split_cfg, "storage": params.get("storage", {})},
+        code=[__file__, read_frame],
+    )
+    with step("restore"):
+        restored = cache.restore(key, outputs)
+    if restored:
+        print(f"[split] restored cached outputs ({key[:12]})")
+        return
 
-    train_df = X_train.copy()
-    train_df["income"] = y_train.values
-    val_df = X_val.copy()
-    val_df["income"] = y_val.values
-    test_df = X_test.copy()
-    test_df["income"] = y_test.values
+    with step("read") as s:
+        df = read_frame(in_path, fmt, dtype=CLEAN_DTYPES)
+        s.rows = len(df)
 
-    train_path = out_dir / "train.csv"
-    val_path = out_dir / "val.csv"
-    test_path = out_dir / "test.csv"
+    if "income" not in df.columns:
+        raise ValueError("Target column 'income' not found. Check preprocessing output.")
 
-    train_df.to_csv(train_path, index=False)
-    val_df.to_csv(val_path, index=False)
-    test_df.to_csv(test_path, index=False)
+    ratios = (train_ratio, val_ratio, test_ratio)
+    with step("assign") as s:
+        if method == "hash":
+            assign = hashed_assign(df, split_cfg.get("hash_columns"), ratios, seed)
+        else:
+            assign = stratified_assign(df["income"], ratios, seed, stratify)
+        s.rows = len(assign)
+
+    # One take per split straight from the loaded frame: no X/y split,
+    # no intermediate X_temp, no re-attaching the target.
+    sizes = {}
+    for k, (name, out_path) in enumerate(zip(SPLITS, outputs)):
+        with step("write") as s:
+            part = df.iloc[np.flatnonzero(assign == k)]
+            write_frame(part, out_path, fmt, compression)
+            s.rows = len(part)
+        sizes[name] = len(part)
+        print(f"[split] {name:<5} class dist: {dist(part['income'])}")
 
     print(f"[split] Input: {in_path} shape={df.shape}")
-    print(f"[split] seed={seed} stratify={stratify}")
-    print(f"[split] train={len(train_df)} val={len(val_df)} test={len(test_df)}")
-    print(f"[split] train class dist: {dist(train_df['income'])}")
-    print(f"[split] val   class dist: {dist(val_df['income'])}")
-    print(f"[split] test  class dist: {dist(test_df['income'])}")
-    print(f"[split] Saved: {train_path}, {val_path}, {test_path}")
+    print(f"[split] seed={seed} method={method} stratify={stratify}")
+    print(f"[split] train={sizes['train']} val={sizes['val']} test={sizes['test']}")
+    print(f"[split] Saved: {', '.join(str(p) for p in outputs)}")
+
+    cache.store(key, outputs)
 
 if __name__ == "__main__":
     main()
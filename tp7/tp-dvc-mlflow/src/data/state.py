@@ -0,0 +1,139 @@
+"""Fitted preprocessing state shared by preprocess, train and predict.
+
+`preprocess.py` writes it next to its output; inference replays the same
+missing-value mapping, numeric scaling and column renaming on raw rows.
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+STATE_VERSION = 1
+MISSING_VALUES = [" ?"]
+
+
+def mark_missing(df: pd.DataFrame, tokens: list[str] = MISSING_VALUES) -> pd.DataFrame:
+    """Replace the raw missing-value tokens by NaN, categorical columns included."""
+    df = df.copy()
+    for col in df.select_dtypes(include="category").columns:
+        present = [t for t in tokens if t in df[col].cat.categories]
+        if present:
+            df[col] = df[col].cat.remove_categories(present)
+    obj_cols = df.select_dtypes(include="object").columns
+    df[obj_cols] = df[obj_cols].replace(tokens, np.nan)
+    return df
+
+
+def clean_columns(columns) -> list[str]:
+    return [c.strip().lower().replace(" ", "_") for c in columns]
+
+
+class PreprocessState:
+    """Scaler statistics, missing-value map and column renaming of one fit."""
+
+    def __init__(
+        self,
+        numeric: list[str],
+        mean: list[float],
+        scale: list[float],
+        columns: dict[str, str],
+        missing_values: list[str] = MISSING_VALUES,
+        raw_sha256: str | None = None,
+        params: dict | None = None,
+        version: int = STATE_VERSION,
+        raw_bytes: int | None = None,
+        fit_sha256: str | None = None,
+    ) -> None:
+        self.numeric = list(numeric)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale_ = np.asarray(scale, dtype=np.float64)
+        self.columns = dict(columns)
+        self.missing_values = list(missing_values)
+        self.raw_sha256 = raw_sha256
+        self.params = dict(params or {})
+        self.version = version
+        # Size of the raw file `raw_sha256` covers; rows past it are appended.
+        self.raw_bytes = raw_bytes
+        # Raw file the scaler statistics were fitted on. Incremental updates
+        # move `raw_sha256` forward but leave the statistics, and this, as is.
+        self.fit_sha256 = fit_sha256
+
+    @classmethod
+    def from_scaler(cls, scaler, numeric, columns, raw_sha256=None, params=None) -> "PreprocessState":
+        return cls(
+            numeric=list(numeric),
+            mean=scaler.mean_.tolist(),
+            scale=scaler.scale_.tolist(),
+            columns={c: n for c, n in zip(columns, clean_columns(columns))},
+            raw_sha256=raw_sha256,
+            params=params,
+        )
+
+    def is_fresh(self, raw_sha256: str, params: dict) -> bool:
+        """True if this state was fitted on the same raw file and settings."""
+        return (
+            self.version == STATE_VERSION
+            and self.fit_sha256 == raw_sha256
+            and self.params == params
+        )
+
+    def scale(self, df: pd.DataFrame) -> pd.DataFrame:
+        df = df.copy()
+        values = df[self.numeric].to_numpy(dtype=np.float64)
+        df[self.numeric] = (values - self.mean) / self.scale_
+        return df
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Apply the inference-time part of preprocessing to raw rows.
+
+        Row filters (duplicates, missing values) are training-set cleaning
+        and are deliberately not replayed here.
+        """
+        df = self.scale(mark_missing(df, self.missing_values))
+        return df.rename(columns=self.columns)
+
+    def to_dict(self) -> dict:
+        return {
+            "version": self.version,
+            "raw_sha256": self.raw_sha256,
+            "raw_bytes": self.raw_bytes,
+            "fit_sha256": self.fit_sha256,
+            "params": self.params,
+            "missing_values": self.missing_values,
+            "columns": self.columns,
+            "numeric": self.numeric,
+            "mean": self.mean.tolist(),
+            "scale": self.scale_.tolist(),
+        }
+
+    def save(self, path: str | Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+    @classmethod
+    def load(cls, path: str | Path) -> "PreprocessState":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != STATE_VERSION:
+            raise ValueError(
+                f"Unsupported preprocess state version {data.get('version')} in {path}, "
+                f"expected {STATE_VERSION}; re-run the preprocess stage"
+            )
+        return cls(
+            numeric=data["numeric"],
+            mean=data["mean"],
+            scale=data["scale"],
+            columns=data["columns"],
+            missing_values=data["missing_values"],
+            raw_sha256=data["raw_sha256"],
+            params=data["params"],
+            version=data["version"],
+            raw_bytes=data.get("raw_bytes"),
+            fit_sha256=data.get("fit_sha256"),
+        )
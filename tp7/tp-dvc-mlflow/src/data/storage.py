@@ -0,0 +1,206 @@
+"""Read/write helpers for the intermediate files of the DVC stages.
+
+The on-disk format is chosen by the `storage` section of `params.yaml`:
+
+- ``csv``: plain text, the historical default;
+- ``parquet``: typed, compressed columns, string columns dictionary-encoded;
+- ``feather``: Arrow IPC file, read back memory-mapped.
+
+The format name doubles as the file extension so that `dvc.yaml` can
+template output paths with ``${storage.format}``.
+"""
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+from typing import Iterator
+
+import pandas as pd
+
+FORMATS = ("csv", "parquet", "feather")
+
+
+def storage_config(params: dict) -> tuple[str, str]:
+    cfg = params.get("storage", {})
+    fmt = cfg.get("format", "csv")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown storage format {fmt!r}, expected one of {FORMATS}")
+    return fmt, cfg.get("compression", "zstd")
+
+
+def data_path(directory: str | Path, stem: str, fmt: str) -> Path:
+    """`directory/stem.<fmt>`, `stem` may carry a (replaced) extension."""
+    return Path(directory) / f"{Path(stem).stem}.{fmt}"
+
+
+def file_sha256(path: str | Path, block_size: int = 1 << 20, size: int | None = None) -> str:
+    """sha256 of the file, or of its first `size` bytes."""
+    h = hashlib.sha256()
+    remaining = size
+    with open(path, "rb") as f:
+        while remaining is None or remaining > 0:
+            block = f.read(block_size if remaining is None else min(block_size, remaining))
+            if not block:
+                break
+            h.update(block)
+            if remaining is not None:
+                remaining -= len(block)
+    return h.hexdigest()
+
+
+def _as_categories(df: pd.DataFrame) -> pd.DataFrame:
+    obj_cols = df.select_dtypes(include=["object"]).columns
+    if len(obj_cols) == 0:
+        return df
+    return df.astype({c: "category" for c in obj_cols})
+
+
+def _with_dtypes(df: pd.DataFrame, dtype: dict | None) -> pd.DataFrame:
+    todo = {c: t for c, t in (dtype or {}).items() if c in df.columns and str(df[c].dtype) != str(t)}
+    return df.astype(todo) if todo else df
+
+
+def write_frame(df: pd.DataFrame, path: str | Path, fmt: str, compression: str = "zstd") -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if fmt == "csv":
+        df.to_csv(path, index=False)
+    elif fmt == "parquet":
+        _as_categories(df).to_parquet(path, index=False, compression=compression)
+    elif fmt == "feather":
+        _as_categories(df).reset_index(drop=True).to_feather(path, compression=compression)
+    else:
+        raise ValueError(f"Unknown storage format {fmt!r}")
+    return path
+
+
+def append_frame(df: pd.DataFrame, path: str | Path, fmt: str, compression: str = "zstd") -> Path:
+    """Append rows to an existing file (csv in place, columnar formats rewritten)."""
+    path = Path(path)
+    if not path.exists():
+        return write_frame(df, path, fmt, compression)
+    if fmt == "csv":
+        columns = pd.read_csv(path, nrows=0).columns
+        df[columns].to_csv(path, mode="a", header=False, index=False)
+        return path
+    existing = read_frame(path, fmt)
+    return write_frame(pd.concat([existing, df[existing.columns]], ignore_index=True), path, fmt, compression)
+
+
+def read_frame(
+    path: str | Path,
+    fmt: str | None = None,
+    columns: list[str] | None = None,
+    names: list[str] | None = None,
+    dtype: dict | None = None,
+) -> pd.DataFrame:
+    """Load `path`; `names` reads a headerless csv with those column names.
+
+    `dtype` maps column names to dtypes (see `src.data.schema`); names
+    absent from the file are ignored.
+    """
+    path = Path(path)
+    fmt = fmt or path.suffix.lstrip(".")
+    if fmt == "csv":
+        return pd.read_csv(path, usecols=columns, header=None if names else "infer", names=names, dtype=dtype)
+    if fmt == "parquet":
+        return _with_dtypes(pd.read_parquet(path, columns=columns, memory_map=True), dtype)
+    if fmt == "feather":
+        import pyarrow.feather as feather
+
+        return _with_dtypes(feather.read_table(str(path), columns=columns, memory_map=True).to_pandas(), dtype)
+    raise ValueError(f"Unknown storage format {fmt!r}")
+
+
+def iter_frames(
+    path: str | Path,
+    chunk_size: int,
+    fmt: str | None = None,
+    names: list[str] | None = None,
+    dtype: dict | None = None,
+) -> Iterator[pd.DataFrame]:
+    """Read `path` in chunks of at most `chunk_size` rows (`names`, `dtype` as in `read_frame`)."""
+    path = Path(path)
+    fmt = fmt or path.suffix.lstrip(".")
+    if fmt == "csv":
+        yield from pd.read_csv(path, chunksize=chunk_size, header=None if names else "infer", names=names,
+                               dtype=dtype)
+    elif fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield _with_dtypes(batch.to_pandas(), dtype)
+    elif fmt == "feather":
+        import pyarrow.feather as feather
+
+        # Memory-mapped: only the sliced chunk is materialized as pandas.
+        table = feather.read_table(str(path), memory_map=True)
+        for offset in range(0, table.num_rows, chunk_size):
+            yield _with_dtypes(table.slice(offset, chunk_size).to_pandas(), dtype)
+    else:
+        raise ValueError(f"Unknown storage format {fmt!r}")
+
+
+class FrameWriter:
+    """Append DataFrame chunks to a single csv/parquet/feather file."""
+
+    def __init__(self, path: str | Path, fmt: str | None = None, compression: str = "zstd") -> None:
+        self.path = Path(path)
+        self.fmt = fmt or self.path.suffix.lstrip(".")
+        if self.fmt not in FORMATS:
+            raise ValueError(f"Unknown storage format {self.fmt!r}")
+        self.compression = compression
+        self.rows = 0
+        self._schema = None
+        self._writer = None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def _to_table(self, df: pd.DataFrame):
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(_as_categories(df), preserve_index=False)
+        if self._schema is None:
+            # Every chunk must share one schema. Parquet takes a dictionary
+            # per row group, so only the index width is fixed; an Arrow IPC
+            # file allows a single dictionary per field, so feather stores
+            # the plain values (readers restore categories via `dtype`).
+            self._schema = pa.schema([
+                f.with_type(
+                    f.type.value_type if self.fmt == "feather"
+                    else pa.dictionary(pa.int32(), f.type.value_type)
+                )
+                if pa.types.is_dictionary(f.type) else f
+                for f in table.schema
+            ])
+        return table.cast(self._schema)
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self.fmt == "csv":
+            df.to_csv(self.path, mode="a" if self.rows else "w", header=not self.rows, index=False)
+        else:
+            table = self._to_table(df)
+            if self._writer is None:
+                if self.fmt == "parquet":
+                    import pyarrow.parquet as pq
+
+                    self._writer = pq.ParquetWriter(self.path, self._schema, compression=self.compression)
+                else:
+                    import pyarrow as pa
+
+                    self._writer = pa.ipc.new_file(
+                        str(self.path), self._schema,
+                        options=pa.ipc.IpcWriteOptions(compression=self.compression),
+                    )
+            self._writer.write_table(table)
+        self.rows += len(df)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self) -> "FrameWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,248 @@
+"""Data-quality profile and drift check of the raw dataset.
+
+One chunked pass over the raw file accumulates, per column, the null rate
+(NaN plus the raw missing-value tokens), category counts for categorical
+columns, and count/mean/std/min/max plus a histogram for numeric columns.
+Histogram edges come from the reference profile, so counts stay
+comparable; without a reference they are quantiles of the first chunk.
+
+The profile is compared against the stored reference profile:
+- missing or extra columns fail the check;
+- null rates above `max_null_rate` fail it;
+- PSI (categories, or histogram bins) above `psi_threshold` is drift;
+- KS (largest gap between the binned CDFs of a numeric column) above
+  `ks_threshold` is drift.
+`reports/data_profile.json` holds the profile, the drift scores and the
+failed checks. The stage exits with an error on failures when
+`fail_on_drift` is set, which keeps `dvc repro` from preprocessing a bad
+batch. The first run, or `--update-reference`, stores the current profile
+as the reference. `src.train.incremental` runs the same checks on the
+appended rows (`check_rows`) and this stage before a full refit.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from src.data.download import COLUMNS, raw_file
+from src.data.perf import profile_iter, profiled, step
+from src.data.state import MISSING_VALUES, mark_missing
+from src.data.storage import iter_frames
+
+PROFILE_PATH = Path("reports/data_profile.json")
+EPS = 1e-6
+OTHER = "__other__"
+
+def load_params(path: str = "params.yaml") -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+class ProfileBuilder:
+    """Accumulate a column profile over DataFrame chunks."""
+
+    def __init__(self, reference: dict | None = None, bins: int = 20, max_categories: int = 100,
+                 missing_values: list[str] = MISSING_VALUES) -> None:
+        self.reference = reference
+        self.bins = bins
+        self.max_categories = max_categories
+        self.missing_values = missing_values
+        self.rows = 0
+        self.columns: list[str] | None = None
+        self.nulls: pd.Series | None = None
+        self.counts: dict[str, Counter] = {}
+        self.numeric: dict[str, dict] = {}
+
+    def _edges(self, col: str, values: np.ndarray) -> np.ndarray:
+        ref = (self.reference or {}).get("columns", {}).get(col, {})
+        if "edges" in ref:
+            inner = np.asarray(ref["edges"], dtype=np.float64)
+        else:
+            quantiles = np.linspace(0, 1, self.bins + 1)[1:-1]
+            inner = np.unique(np.quantile(values, quantiles)) if len(values) else np.zeros(0)
+        return np.concatenate(([-np.inf], inner, [np.inf]))
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        marked = mark_missing(chunk, self.missing_values)
+        if self.columns is None:
+            self.columns = list(chunk.columns)
+            self.nulls = pd.Series(0, index=self.columns, dtype=np.int64)
+            for col in self.columns:
+                if pd.api.types.is_numeric_dtype(chunk[col]):
+                    self.numeric[col] = {"n": 0, "sum": 0.0, "sumsq": 0.0, "min": np.inf, "max": -np.inf,
+                                         "edges": None, "hist": None}
+                else:
+                    self.counts[col] = Counter()
+        self.rows += len(chunk)
+        self.nulls = self.nulls.add(marked.isna().sum(), fill_value=0).astype(np.int64)
+
+        for col, counter in self.counts.items():
+            counter.update(marked[col].value_counts(dropna=True).to_dict())
+        for col, acc in self.numeric.items():
+            values = pd.to_numeric(marked[col], errors="coerce").to_numpy(dtype=np.float64)
+            values = values[~np.isnan(values)]
+            if acc["edges"] is None:
+                acc["edges"] = self._edges(col, values)
+                acc["hist"] = np.zeros(len(acc["edges"]) - 1, dtype=np.int64)
+            acc["hist"] += np.histogram(values, acc["edges"])[0]
+            if len(values):
+                acc["n"] += len(values)
+                acc["sum"] += float(values.sum())
+                acc["sumsq"] += float(np.square(values).sum())
+                acc["min"] = min(acc["min"], float(values.min()))
+                acc["max"] = max(acc["max"], float(values.max()))
+
+    def profile(self) -> dict:
+        columns = {}
+        for col in self.columns or []:
+            entry = {"null_rate": float(self.nulls[col]) / self.rows if self.rows else 0.0}
+            if col in self.counts:
+                counts = self.counts[col].most_common()
+                kept = dict((str(k), int(v)) for k, v in counts[: self.max_categories])
+                rest = sum(v for _, v in counts[self.max_categories:])
+                if rest:
+                    kept[OTHER] = int(rest)
+                entry.update({"kind": "categorical", "cardinality": len(counts), "counts": kept})
+            else:
+                acc = self.numeric[col]
+                n = acc["n"]
+                mean = acc["sum"] / n if n else 0.0
+                entry.update({
+                    "kind": "numeric",
+                    "mean": mean,
+                    "std": float(np.sqrt(max(acc["sumsq"] / n - mean ** 2, 0.0))) if n else 0.0,
+                    "min": acc["min"] if n else None,
+                    "max": acc["max"] if n else None,
+                    # +/-inf are not valid JSON: the outer edges are implicit.
+                    "edges": [float(e) for e in acc["edges"][1:-1]],
+                    "hist": acc["hist"].tolist(),
+                })
+            columns[col] = entry
+        return {"rows": self.rows, "columns": columns}
+
+def build_profile(path: str | Path, chunk_size: int, reference: dict | None = None, bins: int = 20,
+                  max_categories: int = 100, names: list[str] | None = COLUMNS) -> dict:
+    builder = ProfileBuilder(reference, bins, max_categories)
+    for chunk in profile_iter("read", iter_frames(path, chunk_size, "csv", names=names)):
+        with step("profile") as s:
+            builder.update(chunk)
+            s.rows = len(chunk)
+    return builder.profile()
+
+def psi(expected: np.ndarray, actual: np.ndarray) -> float:
+    """Population stability index of two count vectors over the same bins."""
+    p = np.clip(expected / max(expected.sum(), 1), EPS, None)
+    q = np.clip(actual / max(actual.sum(), 1), EPS, None)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+def ks(expected: np.ndarray, actual: np.ndarray) -> float:
+    """Largest gap between the binned CDFs of two count vectors."""
+    p = np.cumsum(expected) / max(expected.sum(), 1)
+    q = np.cumsum(actual) / max(actual.sum(), 1)
+    return float(np.max(np.abs(p - q))) if len(p) else 0.0
+
+def compare(profile: dict, reference: dict, cfg: dict) -> tuple[dict, list[str]]:
+    """(drift scores per column, failed checks) of `profile` vs `reference`."""
+    failures = []
+    ref_cols, cur_cols = reference["columns"], profile["columns"]
+    for col in sorted(set(ref_cols) - set(cur_cols)):
+        failures.append(f"missing column {col!r}")
+    for col in sorted(set(cur_cols) - set(ref_cols)):
+        failures.append(f"unexpected column {col!r}")
+
+    max_null = float(cfg.get("max_null_rate", 0.1))
+    psi_max = float(cfg.get("psi_threshold", 0.2))
+    ks_max = float(cfg.get("ks_threshold", 0.1))
+    drift = {}
+    for col in sorted(set(ref_cols) & set(cur_cols)):
+        ref, cur = ref_cols[col], cur_cols[col]
+        if cur["null_rate"] > max_null:
+            failures.append(f"{col}: null rate {cur['null_rate']:.3f} > {max_null}")
+        if ref["kind"] != cur["kind"]:
+            failures.append(f"{col}: {cur['kind']} but {ref['kind']} in the reference")
+            continue
+        if cur["kind"] == "categorical":
+            cats = list(ref["counts"])
+            expected = np.array([ref["counts"][c] for c in cats] + [0], dtype=np.float64)
+            actual = np.array([cur["counts"].get(c, 0) for c in cats]
+                              + [sum(v for c, v in cur["counts"].items() if c not in ref["counts"])],
+                              dtype=np.float64)
+            scores = {"psi": psi(expected, actual)}
+        else:
+            expected = np.asarray(ref["hist"], dtype=np.float64)
+            actual = np.asarray(cur["hist"], dtype=np.float64)
+            if expected.shape != actual.shape:
+                failures.append(f"{col}: histogram bins differ from the reference")
+                continue
+            scores = {"psi": psi(expected, actual), "ks": ks(expected, actual)}
+        drift[col] = {k: round(v, 6) for k, v in scores.items()}
+        if scores["psi"] > psi_max:
+            failures.append(f"{col}: PSI {scores['psi']:.3f} > {psi_max}")
+        if scores.get("ks", 0.0) > ks_max:
+            failures.append(f"{col}: KS {scores['ks']:.3f} > {ks_max}")
+    return drift, failures
+
+def check_rows(df: pd.DataFrame, reference: dict, cfg: dict) -> tuple[dict, list[str]]:
+    """`compare` for raw rows already in memory, e.g. a batch appended to the raw file."""
+    builder = ProfileBuilder(reference, int(cfg.get("bins", 20)), int(cfg.get("max_categories", 100)))
+    builder.update(df)
+    return compare(builder.profile(), reference, cfg)
+
+def reference_path(cfg: dict) -> Path:
+    return Path(cfg.get("reference", "data/reference/profile.json"))
+
+def load_reference(path: Path) -> dict | None:
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_json(data: dict, path: Path) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1)
+    return path
+
+@profiled("validate")
+def main(argv: list[str] | None = None) -> None:
+    params = load_params()
+    cfg = params.get("validate", {})
+
+    parser = argparse.ArgumentParser(description="Profile the raw data and check it against the reference")
+    parser.add_argument("--update-reference", action="store_true", help="store this profile as the reference")
+    args = parser.parse_args(argv)
+
+    raw_path = raw_file(params)
+    ref_path = reference_path(cfg)
+    reference = None if args.update_reference else load_reference(ref_path)
+
+    profile = build_profile(
+        raw_path,
+        chunk_size=int(cfg.get("chunk_size", 100_000)),
+        reference=reference,
+        bins=int(cfg.get("bins", 20)),
+        max_categories=int(cfg.get("max_categories", 100)),
+    )
+
+    if reference is None:
+        save_json(profile, ref_path)
+        print("[validate] stored reference profile", ref_path)
+        drift, failures = {}, []
+    else:
+        drift, failures = compare(profile, reference, cfg)
+
+    report = {**profile, "drift": drift, "failures": failures, "passed": not failures}
+    save_json(report, PROFILE_PATH)
+    print(f"[validate] {profile['rows']} rows, {len(profile['columns'])} columns, saved {PROFILE_PATH}")
+    for failure in failures:
+        print("[validate] FAILED", failure)
+    if failures and cfg.get("fail_on_drift", True):
+        raise SystemExit(f"[validate] {len(failures)} data check(s) failed, see {PROFILE_PATH}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""NumPy-only scorer for the OneHotEncoder + LogisticRegression pipeline.
+
+`lookup_tables` flattens the fitted `clf` from `train.py` into per-column
+category -> weight tables plus numeric coefficients. They are saved either
+as one `.npz` (`export_lookup`) or as a bundle directory (`export_bundle`):
+`manifest.json` with classes, intercept, column order and category
+vocabularies, and every weight in one flat `weights.npy`. `FastScorer`
+replays the logistic model from either without pandas or sklearn, so a
+cold worker only pays for importing NumPy.
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Mapping, Sequence
+
+import numpy as np
+
+CAT_PREFIX = "cat__"
+BUNDLE_VERSION = 1
+MANIFEST = "manifest.json"
+WEIGHTS = "weights.npy"
+
+
+def lookup_tables(clf) -> dict[str, np.ndarray]:
+    """Weight tables of a fitted `Pipeline(prep, model)`."""
+    prep = clf.named_steps["prep"]
+    model = clf.named_steps["model"]
+    if model.coef_.shape[0] != 1:
+        raise ValueError("Only binary LogisticRegression models can be exported")
+
+    coef = model.coef_[0]
+    arrays: dict[str, np.ndarray] = {
+        "classes": np.asarray([str(c) for c in model.classes_]),
+        "intercept": np.asarray(model.intercept_[0], dtype=np.float64),
+    }
+
+    offset = 0
+    cat_cols: list[str] = []
+    num_cols: list[str] = []
+    for name, transformer, columns in prep.transformers_:
+        if name == "remainder":
+            continue
+        if name == "cat":
+            if transformer.drop is not None:
+                raise ValueError("Only OneHotEncoder(drop=None) is supported")
+            infrequent = getattr(transformer, "infrequent_categories_", None) or [None] * len(columns)
+            for col, cats, infreq in zip(columns, transformer.categories_, infrequent):
+                if infreq is None:
+                    n_out = len(cats)
+                    weights = coef[offset:offset + n_out]
+                else:
+                    # Frequent categories keep their own column, infrequent
+                    # ones share the last column of this feature.
+                    frequent = ~np.isin(cats, infreq)
+                    n_out = int(frequent.sum()) + 1
+                    block = coef[offset:offset + n_out]
+                    weights = np.empty(len(cats))
+                    weights[frequent] = block[:-1]
+                    weights[~frequent] = block[-1]
+                arrays[CAT_PREFIX + col + "__values"] = np.asarray(cats, dtype=str)
+                arrays[CAT_PREFIX + col + "__weights"] = np.asarray(weights, dtype=np.float64)
+                offset += n_out
+                cat_cols.append(col)
+        elif name == "num":
+            num_cols.extend(columns)
+            arrays["num_coef"] = coef[offset:offset + len(columns)].astype(np.float64)
+            offset += len(columns)
+        else:
+            raise ValueError(f"Unsupported transformer {name!r}")
+
+    if offset != coef.shape[0]:
+        raise ValueError(f"Exported {offset} weights but the model has {coef.shape[0]}")
+
+    arrays["cat_columns"] = np.asarray(cat_cols, dtype=str)
+    arrays["num_columns"] = np.asarray(num_cols, dtype=str)
+    arrays.setdefault("num_coef", np.zeros(0))
+    return arrays
+
+
+def export_lookup(clf, out_path: str | Path) -> Path:
+    """Write the weight tables of a fitted `Pipeline(prep, model)` to `.npz`."""
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez(out_path, **lookup_tables(clf))
+    return out_path
+
+
+def export_bundle(clf, out_dir: str | Path) -> Path:
+    """Write `manifest.json` + `weights.npy` for a fitted `Pipeline(prep, model)`.
+
+    Category weights are stored per column in vocabulary order, followed by
+    the numeric coefficients; `offsets` gives each slice of `weights.npy`.
+    """
+    arrays = lookup_tables(clf)
+    cat_cols = arrays["cat_columns"].tolist()
+    pieces, offsets, vocab, start = [], {}, {}, 0
+    for col in cat_cols:
+        weights = arrays[CAT_PREFIX + col + "__weights"]
+        vocab[col] = arrays[CAT_PREFIX + col + "__values"].tolist()
+        offsets[col] = [start, start + len(weights)]
+        pieces.append(weights)
+        start += len(weights)
+    pieces.append(arrays["num_coef"])
+    manifest = {
+        "version": BUNDLE_VERSION,
+        "classes": arrays["classes"].tolist(),
+        "intercept": float(arrays["intercept"]),
+        "cat_columns": cat_cols,
+        "num_columns": arrays["num_columns"].tolist(),
+        "vocab": vocab,
+        "offsets": offsets,
+        "num_offset": [start, start + len(arrays["num_coef"])],
+    }
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    np.save(out_dir / WEIGHTS, np.concatenate(pieces).astype(np.float64))
+    with open(out_dir / MANIFEST, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+    return out_dir
+
+
+def read_bundle(path: str | Path) -> dict[str, np.ndarray]:
+    """Rebuild the `lookup_tables` arrays from a bundle directory."""
+    path = Path(path)
+    with open(path / MANIFEST, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != BUNDLE_VERSION:
+        raise ValueError(f"Unsupported model bundle version {manifest.get('version')!r} in {path}")
+    weights = np.load(path / WEIGHTS, allow_pickle=False)
+
+    arrays: dict[str, np.ndarray] = {
+        "classes": np.asarray(manifest["classes"], dtype=str),
+        "intercept": np.asarray(manifest["intercept"], dtype=np.float64),
+        "cat_columns": np.asarray(manifest["cat_columns"], dtype=str),
+        "num_columns": np.asarray(manifest["num_columns"], dtype=str),
+        "num_coef": weights[slice(*manifest["num_offset"])],
+    }
+    for col in manifest["cat_columns"]:
+        arrays[CAT_PREFIX + col + "__values"] = np.asarray(manifest["vocab"][col], dtype=str)
+        arrays[CAT_PREFIX + col + "__weights"] = weights[slice(*manifest["offsets"][col])]
+    return arrays
+
+
+class FastScorer:
+    """Score rows from exported lookup tables."""
+
+    def __init__(self, arrays: Mapping[str, np.ndarray]) -> None:
+        self.classes = [str(c) for c in arrays["classes"]]
+        self.intercept = float(arrays["intercept"])
+        self.cat_columns = [str(c) for c in arrays["cat_columns"]]
+        self.num_columns = [str(c) for c in arrays["num_columns"]]
+        self.num_coef = np.asarray(arrays["num_coef"], dtype=np.float64)
+        # Sorted category arrays (OneHotEncoder sorts categories_) for batch
+        # lookups, plus plain dicts for the single-row path.
+        self._values = {c: arrays[CAT_PREFIX + c + "__values"] for c in self.cat_columns}
+        self._weights = {c: arrays[CAT_PREFIX + c + "__weights"] for c in self.cat_columns}
+        self._tables = {
+            c: dict(zip(self._values[c].tolist(), self._weights[c].tolist()))
+            for c in self.cat_columns
+        }
+        self._num_pairs = list(zip(self.num_columns, self.num_coef.tolist()))
+
+    @classmethod
+    def load(cls, path: str | Path) -> "FastScorer":
+        """Load a bundle directory or an `.npz` from `export_lookup`."""
+        if Path(path).is_dir():
+            return cls(read_bundle(path))
+        with np.load(path, allow_pickle=False) as data:
+            return cls({k: data[k] for k in data.files})
+
+    def decision_one(self, row: Mapping) -> float:
+        z = self.intercept
+        for col, table in self._tables.items():
+            z += table.get(row[col], 0.0)
+        for col, w in self._num_pairs:
+            z += w * float(row[col])
+        return z
+
+    def predict_proba_one(self, row: Mapping) -> np.ndarray:
+        p = 1.0 / (1.0 + np.exp(-self.decision_one(row)))
+        return np.array([1.0 - p, p])
+
+    def decision_function(self, columns: Mapping[str, Sequence]) -> np.ndarray:
+        """Vectorized decision values for a column -> values mapping."""
+        z = None
+        for col in self.cat_columns:
+            values, weights = self._values[col], self._weights[col]
+            x = np.asarray(columns[col], dtype=str)
+            idx = np.searchsorted(values, x)
+            idx[idx == len(values)] = 0
+            contrib = np.where(values[idx] == x, weights[idx], 0.0)
+            z = contrib if z is None else z + contrib
+        if self.num_columns:
+            num = np.column_stack([np.asarray(columns[c], dtype=np.float64) for c in self.num_columns])
+            contrib = num @ self.num_coef
+            z = contrib if z is None else z + contrib
+        return z + self.intercept
+
+    def predict_proba(self, columns: Mapping[str, Sequence]) -> np.ndarray:
+        p = 1.0 / (1.0 + np.exp(-self.decision_function(columns)))
+        return np.column_stack([1.0 - p, p])
+
+    def predict(self, columns: Mapping[str, Sequence]) -> np.ndarray:
+        z = self.decision_function(columns)
+        return np.asarray(self.classes)[(z > 0).astype(int)]
+
+
+def main() -> None:
+    import joblib
+
+    model_path = Path("models/model.joblib")
+    out_path = export_bundle(joblib.load(model_path), Path("models/model_bundle"))
+    print("[fast_scorer] exported model bundle to", out_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""Batch scoring with the trained pipeline.
+
+The `predict` DVC stage scores `predict.input` in `predict.shards` shards.
+A row goes to shard `hash(row) % shards`, so editing a row in place only
+changes the shard it leaves and the one it joins. Each shard is written
+to its own file under `predict.output_dir`, and `predict.manifest`
+records, per shard, a digest of its input rows (content and row numbers)
+and the sha256 of its output. On a rerun, a shard is rescored only if its
+digest, the model, the preprocessing state or the shard count changed, or
+if its output file is missing or was modified. Both outputs are
+`persist`ed, so DVC leaves the untouched shard files in place. Chunks of
+the stale shards are scored in parallel.
+
+`--output FILE` scores the whole input into a single file instead.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import yaml
+import numpy as np
+import pandas as pd
+import joblib
+
+from src.data.download import COLUMNS
+from src.data.perf import profiled, step
+from src.data.schema import CLEAN_DTYPES, RAW_DTYPES
+from src.data.state import PreprocessState
+from src.data.storage import FrameWriter, file_sha256, iter_frames
+
+TARGET = "income"
+MANIFEST_VERSION = 1
+
+# Pipeline (and optional preprocessing state) loaded once per process and
+# file: inherited on fork, reloaded by the pool initializer under spawn.
+_MODEL = None
+_STATE = None
+_LOADED: dict[str, tuple] = {}
+
+
+def load_params(path: str = "params.yaml") -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+
+def _file_key(path: str | Path) -> tuple:
+    """Identity of a file on disk: a rewritten file is loaded again."""
+    path = Path(path).resolve()
+    st = path.stat()
+    return str(path), st.st_mtime_ns, st.st_size
+
+
+def load_model(model_path: str | Path):
+    global _MODEL
+    key = _file_key(model_path)
+    if _MODEL is None or _LOADED.get("model") != key:
+        _MODEL = joblib.load(model_path)
+        _LOADED["model"] = key
+    return _MODEL
+
+
+def load_state(state_path: str | Path | None):
+    """Load the state used by `score_chunk`; None scores clean rows as is."""
+    global _STATE
+    if state_path is None:
+        _STATE = None
+        _LOADED.pop("state", None)
+        return None
+    key = _file_key(state_path)
+    if _STATE is None or _LOADED.get("state") != key:
+        _STATE = PreprocessState.load(state_path)
+        _LOADED["state"] = key
+    return _STATE
+
+
+def _init_worker(model_path: str, state_path: str | None) -> None:
+    load_model(model_path)
+    load_state(state_path)
+
+
+def score_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Score one chunk with the process-local Pipeline."""
+    model = _MODEL
+    if _STATE is not None:
+        chunk = _STATE.transform(chunk)
+    X = chunk.drop(columns=[TARGET], errors="ignore")
+    proba = model.predict_proba(X)
+    classes = model.classes_
+    out = pd.DataFrame(
+        proba, columns=[f"proba_{str(c).strip()}" for c in classes], index=chunk.index
+    )
+    out.insert(0, "prediction", classes[np.argmax(proba, axis=1)])
+    return out
+
+
+def input_options(state_path: Path | None) -> dict:
+    """`iter_frames` options for the input: raw rows come in the download layout."""
+    if state_path is not None:
+        return {"fmt": "csv", "names": COLUMNS, "dtype": RAW_DTYPES}
+    return {"dtype": CLEAN_DTYPES}
+
+
+def predict_file(
+    model_path: Path,
+    in_path: Path,
+    out_path: Path,
+    chunk_size: int = 50_000,
+    n_jobs: int = 1,
+    state_path: Path | None = None,
+) -> dict:
+    """Stream `in_path` through the model and write predictions to `out_path`.
+
+    At most ``2 * n_jobs`` chunks are in flight at any time, so memory stays
+    bounded by the chunk size whatever the size of the input file. When
+    `state_path` is given, input rows are raw (headerless csv, as written
+    by the download stage) and go through the fitted preprocessing state
+    (missing values, scaling, column names) first.
+    """
+    load_model(model_path)
+    load_state(state_path)
+    read = input_options(state_path)
+    start = time.perf_counter()
+    with FrameWriter(out_path) as writer:
+        if n_jobs <= 1:
+            for chunk in iter_frames(in_path, chunk_size, **read):
+                writer.write(score_chunk(chunk))
+        else:
+            with ProcessPoolExecutor(
+                max_workers=n_jobs, initializer=_init_worker, initargs=(str(model_path), state_path and str(state_path))
+            ) as pool:
+                pending: deque = deque()
+                for chunk in iter_frames(in_path, chunk_size, **read):
+                    pending.append(pool.submit(score_chunk, chunk))
+                    if len(pending) >= 2 * n_jobs:
+                        writer.write(pending.popleft().result())
+                while pending:
+                    writer.write(pending.popleft().result())
+    n_rows = writer.rows
+
+    elapsed = time.perf_counter() - start
+    return {
+        "rows": n_rows,
+        "seconds": elapsed,
+        "rows_per_sec": n_rows / elapsed if elapsed > 0 else float("inf"),
+    }
+
+
+def shard_of(chunk: pd.DataFrame, shards: int) -> np.ndarray:
+    """Shard index of every row, from a hash of its content."""
+    h = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+    return (h % np.uint64(shards)).astype(np.int64)
+
+
+def shard_digests(in_path: Path, shards: int, chunk_size: int, **read) -> tuple[list[str], list[int]]:
+    """Digest and row count of every shard's input rows (`read` as in `iter_frames`)."""
+    hashers = [hashlib.sha256() for _ in range(shards)]
+    counts = [0] * shards
+    start = 0
+    for chunk in iter_frames(in_path, chunk_size, **read):
+        h = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+        rows = np.arange(start, start + len(chunk), dtype=np.int64)
+        shard = (h % np.uint64(shards)).astype(np.int64)
+        for k in np.unique(shard):
+            sel = shard == k
+            hashers[k].update(rows[sel].tobytes())
+            hashers[k].update(h[sel].tobytes())
+            counts[k] += int(sel.sum())
+        start += len(chunk)
+    return [h.hexdigest() for h in hashers], counts
+
+
+def shard_path(out_dir: Path, shard: int) -> Path:
+    return out_dir / f"part-{shard:04d}.csv"
+
+
+def load_manifest(path: Path) -> dict | None:
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def predict_shards(
+    model_path: Path,
+    in_path: Path,
+    out_dir: Path,
+    manifest_path: Path,
+    shards: int,
+    chunk_size: int = 50_000,
+    n_jobs: int = 1,
+    state_path: Path | None = None,
+) -> dict:
+    """Score the stale shards of `in_path` into `out_dir` and update the manifest.
+
+    Output rows keep their input row number in a `row` column.
+    """
+    load_model(model_path)
+    load_state(state_path)
+    read = input_options(state_path)
+    start = time.perf_counter()
+
+    context = {
+        "version": MANIFEST_VERSION,
+        "input": str(in_path),
+        "model_sha256": file_sha256(model_path),
+        "state_sha256": file_sha256(state_path) if state_path is not None else None,
+        "n_shards": shards,
+    }
+    previous = load_manifest(manifest_path)
+    old_entries = previous["shards"] if previous and {k: previous.get(k) for k in context} == context else []
+
+    digests, counts = shard_digests(in_path, shards, chunk_size, **read)
+    entries, stale = [], []
+    for k in range(shards):
+        path = shard_path(out_dir, k)
+        old = old_entries[k] if k < len(old_entries) else {}
+        fresh = old.get("input_digest") == digests[k] and (
+            counts[k] == 0 or (path.exists() and file_sha256(path) == old.get("output_sha256"))
+        )
+        entries.append({"shard": k, "rows": counts[k], "input_digest": digests[k],
+                        "output": str(path) if counts[k] else None, "rescored": not fresh})
+        if not fresh:
+            stale.append(k)
+            path.unlink(missing_ok=True)
+    # Shards left over from a larger shard count.
+    if out_dir.exists():
+        keep = {shard_path(out_dir, k).name for k in range(shards)}
+        for path in out_dir.glob("part-*.csv"):
+            if path.name not in keep:
+                path.unlink()
+
+    n_rows = 0
+    if stale:
+        out_dir.mkdir(parents=True, exist_ok=True)
+        writers = {k: FrameWriter(shard_path(out_dir, k)) for k in stale}
+        stale_set = np.array(stale)
+
+        def write(k: int, scored: pd.DataFrame) -> None:
+            scored.insert(0, "row", scored.index.to_numpy())
+            writers[k].write(scored)
+
+        def parts():
+            offset = 0
+            for chunk in iter_frames(in_path, chunk_size, **read):
+                chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+                offset += len(chunk)
+                shard = shard_of(chunk, shards)
+                for k in np.intersect1d(np.unique(shard), stale_set):
+                    yield int(k), chunk[shard == k]
+
+        try:
+            if n_jobs <= 1:
+                for k, part in parts():
+                    write(k, score_chunk(part))
+                    n_rows += len(part)
+            else:
+                with ProcessPoolExecutor(
+                    max_workers=n_jobs, initializer=_init_worker,
+                    initargs=(str(model_path), state_path and str(state_path)),
+                ) as pool:
+                    # Results are written in submission order, so each shard
+                    # file keeps the input row order.
+                    pending: deque = deque()
+                    for k, part in parts():
+                        pending.append((k, pool.submit(score_chunk, part)))
+                        n_rows += len(part)
+                        if len(pending) >= 2 * n_jobs:
+                            done, fut = pending.popleft()
+                            write(done, fut.result())
+                    while pending:
+                        done, fut = pending.popleft()
+                        write(done, fut.result())
+        finally:
+            for writer in writers.values():
+                writer.close()
+
+    for entry in entries:
+        entry["output_sha256"] = file_sha256(entry["output"]) if entry["output"] else None
+    manifest = {**context, "rows": sum(counts), "shards": entries}
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = manifest_path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, manifest_path)
+
+    elapsed = time.perf_counter() - start
+    return {
+        "rows": n_rows,
+        "seconds": elapsed,
+        "rows_per_sec": n_rows / elapsed if elapsed > 0 else float("inf"),
+        "rescored": stale,
+    }
+
+
+@profiled("predict")
+def main() -> None:
+    params = load_params()
+    cfg = params.get("predict", {})
+
+    parser = argparse.ArgumentParser(description="Batch scoring with the trained pipeline")
+    parser.add_argument("--model", default=cfg.get("model_path", "models/model.joblib"))
+    parser.add_argument("--input", default=cfg.get("input", "data/splits/test.csv"))
+    parser.add_argument("--output", help="score into this single file instead of the shards")
+    parser.add_argument("--output-dir", default=cfg.get("output_dir", "data/predictions/shards"))
+    parser.add_argument("--manifest", default=cfg.get("manifest", "data/predictions/manifest.json"))
+    parser.add_argument("--shards", type=int, default=int(cfg.get("shards", 8)))
+    parser.add_argument("--chunk-size", type=int, default=int(cfg.get("chunk_size", 50_000)))
+    parser.add_argument("--n-jobs", type=int, default=int(cfg.get("n_jobs", 1)))
+    parser.add_argument("--raw-input", action=argparse.BooleanOptionalAction,
+                        default=bool(cfg.get("raw_input", False)),
+                        help="apply the fitted preprocessing state to raw rows (headerless csv, as downloaded)")
+    parser.add_argument("--state", default=cfg.get("state_path", "models/preprocess_state.json"))
+    args = parser.parse_args()
+
+    state_path = Path(args.state) if args.raw_input else None
+    with step("score") as s:
+        if args.output:
+            stats = predict_file(Path(args.model), Path(args.input), Path(args.output),
+                                 chunk_size=args.chunk_size, n_jobs=args.n_jobs, state_path=state_path)
+        else:
+            stats = predict_shards(Path(args.model), Path(args.input), Path(args.output_dir), Path(args.manifest),
+                                   args.shards, chunk_size=args.chunk_size, n_jobs=args.n_jobs,
+                                   state_path=state_path)
+        s.rows = stats["rows"]
+
+    print(f"[predict] Input: {args.input} chunk_size={args.chunk_size} n_jobs={args.n_jobs}")
+    print(f"[predict] scored {stats['rows']} rows in {stats['seconds']:.2f}s "
+          f"({stats['rows_per_sec']:.0f} rows/sec)")
+    if args.output:
+        print("[predict] saved predictions to", args.output)
+    else:
+        print(f"[predict] rescored shards {stats['rescored']} of {args.shards}, "
+              f"saved to {args.output_dir}, manifest {args.manifest}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from pathlib import Path
+
+import yaml
+import numpy as np
+import pandas as pd
+import joblib
+from flask import Flask, jsonify, request
+
+
+def load_params(path: str = "params.yaml") -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+
+class LatencyRecorder:
+    """Keep the last `window` request latencies and report percentiles."""
+
+    def __init__(self, window: int = 10_000) -> None:
+        self._samples: deque = deque(maxlen=window)
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+            self._count += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            samples = np.fromiter(self._samples, dtype=float)
+            count = self._count
+        if samples.size == 0:
+            return {"count": count, "p50_ms": None, "p99_ms": None}
+        p50, p99 = np.percentile(samples, [50, 99]) * 1000.0
+        return {"count": count, "p50_ms": float(p50), "p99_ms": float(p99)}
+
+
+def numeric_columns(model) -> list[str]:
+    """Columns the fitted ColumnTransformer passes through as numbers."""
+    prep = getattr(model, "named_steps", {}).get("prep")
+    for name, _, cols in getattr(prep, "transformers_", []):
+        if name == "num":
+            return list(cols)
+    return []
+
+
+class MicroBatcher:
+    """Coalesce concurrent scoring requests into single `predict_proba` calls.
+
+    Request threads enqueue their feature frame and block on a future; one
+    background thread drains the queue for up to `max_wait_ms` (or until
+    `max_batch_size` rows are collected) and scores everything at once. If
+    a batch fails, its requests are rescored one at a time so that only the
+    faulty one gets the error.
+    """
+
+    def __init__(self, model, max_batch_size: int = 256, max_wait_ms: float = 2.0) -> None:
+        self.model = model
+        self.columns = list(model.feature_names_in_)
+        self.numeric = set(numeric_columns(model))
+        self.classes = [str(c).strip() for c in model.classes_]
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.n_batches = 0
+        self.n_rows = 0
+        self._queue: queue.Queue = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def frame(self, rows: list[dict]) -> pd.DataFrame:
+        """Feature frame of request rows; ValueError names the first bad feature."""
+        X = pd.DataFrame.from_records(rows, columns=self.columns)
+        for col in self.columns:
+            if col in self.numeric:
+                try:
+                    X[col] = pd.to_numeric(X[col], errors="raise")
+                except (ValueError, TypeError):
+                    raise ValueError(f"feature {col!r} must be numeric") from None
+            elif not X[col].map(lambda v: v is None or isinstance(v, str)).all():
+                raise ValueError(f"feature {col!r} must be a string")
+        return X
+
+    def submit(self, X: pd.DataFrame) -> np.ndarray:
+        future: Future = Future()
+        self._queue.put((X, future))
+        return future.result()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _collect(self) -> list[tuple[pd.DataFrame, Future]]:
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+        batch = [first]
+        n_rows = len(first[0])
+        deadline = time.perf_counter() + self.max_wait
+        while n_rows < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            n_rows += len(item[0])
+        return batch
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            batch = self._collect()
+            if not batch:
+                continue
+            try:
+                X = pd.concat([frame for frame, _ in batch], ignore_index=True)
+                proba = self.model.predict_proba(X)
+            except Exception:
+                self._score_each(batch)
+                continue
+            self.n_batches += 1
+            self.n_rows += len(X)
+            offset = 0
+            for frame, future in batch:
+                future.set_result(proba[offset:offset + len(frame)])
+                offset += len(frame)
+
+    def _score_each(self, batch: list[tuple[pd.DataFrame, Future]]) -> None:
+        for frame, future in batch:
+            try:
+                proba = self.model.predict_proba(frame)
+            except Exception as exc:
+                future.set_exception(exc)
+                continue
+            self.n_batches += 1
+            self.n_rows += len(frame)
+            future.set_result(proba)
+
+
+def create_app(config: dict | None = None) -> Flask:
+    cfg = {"model_path": "models/model.joblib", "max_batch_size": 256, "max_wait_ms": 2.0}
+    if config:
+        cfg.update(config)
+
+    app = Flask(__name__)
+    model = cfg["model"] if "model" in cfg else joblib.load(Path(cfg["model_path"]))
+    batcher = MicroBatcher(
+        model,
+        max_batch_size=int(cfg["max_batch_size"]),
+        max_wait_ms=float(cfg["max_wait_ms"]),
+    )
+    latency = LatencyRecorder()
+    app.extensions["batcher"] = batcher
+
+    @app.get("/health")
+    def health():
+        return jsonify({"status": "ok"}), 200
+
+    @app.post("/predict")
+    def predict():
+        start = time.perf_counter()
+        payload = request.get_json(silent=True)
+        rows = [payload] if isinstance(payload, dict) else payload
+        if not isinstance(rows, list) or not rows or not all(isinstance(r, dict) for r in rows):
+            return jsonify({"error": "JSON object or non-empty list of objects required"}), 400
+        missing = sorted({c for r in rows for c in batcher.columns if c not in r})
+        if missing:
+            return jsonify({"error": f"missing features: {missing}"}), 400
+
+        try:
+            X = batcher.frame(rows)
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+        try:
+            proba = batcher.submit(X)
+        except (ValueError, TypeError) as exc:
+            return jsonify({"error": f"cannot score request: {exc}"}), 400
+        except Exception as exc:
+            return jsonify({"error": f"scoring failed: {exc}"}), 500
+        labels = np.asarray(batcher.classes)[np.argmax(proba, axis=1)]
+        latency.record(time.perf_counter() - start)
+        return jsonify({
+            "predictions": labels.tolist(),
+            "probabilities": [dict(zip(batcher.classes, p)) for p in proba.tolist()],
+        }), 200
+
+    @app.get("/metrics")
+    def metrics():
+        n_batches, n_rows = batcher.n_batches, batcher.n_rows
+        return jsonify({
+            "latency": latency.snapshot(),
+            "batches": n_batches,
+            "rows": n_rows,
+            "mean_batch_rows": n_rows / n_batches if n_batches else None,
+        }), 200
+
+    return app
+
+
+def main() -> None:
+    params = load_params()
+    cfg = params.get("serve", {})
+    app = create_app(cfg)
+    print(f"[serve] model={cfg.get('model_path', 'models/model.joblib')} "
+          f"max_batch_size={cfg.get('max_batch_size', 256)} max_wait_ms={cfg.get('max_wait_ms', 2.0)}")
+    app.run(host=cfg.get("host", "0.0.0.0"), port=int(cfg.get("port", 8000)), threaded=True)
+
+
+if __name__ == "__main__":
+    main()
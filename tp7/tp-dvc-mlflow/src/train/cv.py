@@ -0,0 +1,92 @@
+"""Repeated stratified k-fold evaluation of the training configuration.
+
+Every (seed, fold) pair is an independent fit on the encoded train split
+from the `FeatureStore`. Workers memory-map that entry read-only and
+rebuild their fold indices from the seed, so nothing but a few integers
+and the model parameters is pickled per task. With at least
+`len(seeds) * folds` cores the whole evaluation takes about one fit.
+
+The seed drives both the fold shuffle and the model's `random_state`, so
+the spread covers split noise and solver randomness.
+"""
+from __future__ import annotations
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from sklearn.model_selection import StratifiedKFold
+
+from src.train.features import load_split
+from src.train.pipeline import build_model
+from src.train.tracking import AsyncLogger, run_logger
+
+# Per-process memo of the memory-mapped (X_train, y_train) by entry.
+_DATA: dict = {}
+
+
+def _load(entry: str):
+    if entry not in _DATA:
+        _DATA[entry] = load_split(entry, "train")
+    return _DATA[entry]
+
+
+def fold_indices(y: np.ndarray, folds: int, seed: int) -> list[tuple[np.ndarray, np.ndarray]]:
+    skf = StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed)
+    return list(skf.split(np.zeros(len(y)), y))
+
+
+def _fit_fold(entry: str, seed: int, fold: int, folds: int, model_params: dict) -> tuple[int, int, float]:
+    X, y = _load(entry)
+    train_idx, test_idx = fold_indices(y, folds, seed)[fold]
+    model = build_model(seed, model_params)
+    model.fit(X[train_idx], y[train_idx])
+    score = float((model.predict(X[test_idx]) == y[test_idx]).mean())
+    return seed, fold, score
+
+
+def run_cv(entry: str | Path, model_params: dict, cfg: dict, logger: AsyncLogger | None = None) -> dict:
+    """Run `cfg["folds"]`-fold CV for every seed in `cfg["seeds"]`.
+
+    Logs the per-fit scores as `cv_accuracy` steps and their mean, std and
+    variance through `logger`, or to the active MLflow run.
+    """
+    folds = int(cfg.get("folds", 5))
+    seeds = [int(s) for s in cfg.get("seeds", [42])]
+    n_jobs = int(cfg.get("n_jobs") or os.cpu_count() or 1)
+    tasks = [(seed, fold) for seed in seeds for fold in range(folds)]
+
+    with ProcessPoolExecutor(max_workers=min(n_jobs, len(tasks))) as pool:
+        futures = [pool.submit(_fit_fold, str(entry), seed, fold, folds, model_params) for seed, fold in tasks]
+        results = [fut.result() for fut in futures]
+
+    scores = np.array([score for _, _, score in results])
+    per_seed = {str(seed): float(np.mean([s for sd, _, s in results if sd == seed])) for seed in seeds}
+    summary = {
+        "folds": folds,
+        "seeds": seeds,
+        "cv_accuracy_mean": float(scores.mean()),
+        "cv_accuracy_std": float(scores.std(ddof=1)) if len(scores) > 1 else 0.0,
+        "cv_accuracy_var": float(scores.var(ddof=1)) if len(scores) > 1 else 0.0,
+        "per_seed_mean": per_seed,
+        "scores": [{"seed": seed, "fold": fold, "accuracy": score} for seed, fold, score in results],
+    }
+
+    with run_logger(logger) as log:
+        for step, score in enumerate(scores):
+            log.log_metric("cv_accuracy", float(score), step=step)
+        log.log_metrics({k: summary[k] for k in ("cv_accuracy_mean", "cv_accuracy_std", "cv_accuracy_var")})
+        log.log_params({"cv_folds": folds, "cv_seeds": ",".join(map(str, seeds))})
+    print(f"[cv] {len(seeds)} seed(s) x {folds} folds: accuracy "
+          f"{summary['cv_accuracy_mean']:.4f} +/- {summary['cv_accuracy_std']:.4f}")
+    return summary
+
+
+def save_result(result: dict, path: str | Path = "reports/cv.json") -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    return path
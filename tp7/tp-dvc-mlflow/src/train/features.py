@@ -0,0 +1,114 @@
+"""Persisted one-hot design matrices for train/val/test.
+
+An entry holds the fitted ColumnTransformer and, for each split, the CSR
+components (`data`, `indices`, `indptr`) and the targets as plain `.npy`
+files, so workers can memory-map them read-only instead of re-encoding or
+unpickling. Entries are keyed on the sha256 of the three split files, the
+encoder parameters and the code deciding what is encoded (this module,
+`schema` and `pipeline`); the `keep` most recently used are retained.
+"""
+from __future__ import annotations
+
+import hashlib
+import inspect
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import scipy.sparse as sp
+import sklearn
+import joblib
+
+from src.data import schema
+from src.data.schema import CLEAN_DTYPES
+from src.data.storage import file_sha256, read_frame
+from src.train import pipeline
+
+SPLIT_NAMES = ("train", "val", "test")
+TARGET = "income"
+
+
+class FeatureStore:
+    def __init__(self, root: str | Path = "data/features", keep: int = 4) -> None:
+        self.root = Path(root)
+        self.keep = keep
+
+    @classmethod
+    def from_params(cls, params: dict) -> "FeatureStore":
+        cfg = params.get("features", {})
+        return cls(root=cfg.get("dir", "data/features"), keep=int(cfg.get("keep", 4)))
+
+    def key(self, split_paths: dict, encoder_params: dict | None) -> str:
+        payload = {
+            "splits": {name: file_sha256(split_paths[name]) for name in SPLIT_NAMES},
+            "encoder": encoder_params or {},
+            "sklearn": sklearn.__version__,
+            # What gets encoded, and how: the dtypes, the column selection
+            # and target casting here, and the preprocessor.
+            "code": [file_sha256(path) for path in (__file__, inspect.getsourcefile(schema),
+                                                    inspect.getsourcefile(pipeline))],
+        }
+        blob = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(blob).hexdigest()
+
+    def get_or_build(self, split_paths: dict, fmt: str | None = None, encoder_params: dict | None = None) -> Path:
+        """Return the entry directory, encoding the splits on a miss."""
+        key = self.key(split_paths, encoder_params)
+        entry = self.root / key
+        if (entry / "meta.json").exists():
+            os.utime(entry / "meta.json")
+            return entry
+
+        frames = {name: read_frame(split_paths[name], fmt, dtype=CLEAN_DTYPES) for name in SPLIT_NAMES}
+        X_train = frames["train"].drop(columns=[TARGET])
+        cat_cols = X_train.select_dtypes(include=["object", "category"]).columns.tolist()
+        num_cols = [c for c in X_train.columns if c not in cat_cols]
+        prep = pipeline.build_preprocessor(cat_cols, num_cols, encoder_params)
+        prep.fit(X_train)
+
+        tmp = self.root / f"{key}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        shapes = {}
+        for name, df in frames.items():
+            X = sp.csr_matrix(prep.transform(df.drop(columns=[TARGET])), dtype=np.float64)
+            np.save(tmp / f"{name}_data.npy", X.data)
+            np.save(tmp / f"{name}_indices.npy", X.indices)
+            np.save(tmp / f"{name}_indptr.npy", X.indptr)
+            np.save(tmp / f"{name}_y.npy", df[TARGET].astype(str).to_numpy(dtype=str))
+            shapes[name] = list(X.shape)
+        joblib.dump(prep, tmp / "preprocessor.joblib")
+        with open(tmp / "meta.json", "w", encoding="utf-8") as f:
+            json.dump({"cat_cols": cat_cols, "num_cols": num_cols,
+                       "encoder_params": encoder_params or {}, "shapes": shapes}, f, indent=2)
+        os.replace(tmp, entry)
+        print(f"[features] encoded {', '.join(f'{n}={s[0]}x{s[1]}' for n, s in shapes.items())} -> {entry}")
+        self.prune()
+        return entry
+
+    def prune(self) -> None:
+        entries = sorted(
+            (p for p in self.root.iterdir() if (p / "meta.json").exists()),
+            key=lambda p: (p / "meta.json").stat().st_mtime,
+            reverse=True,
+        )
+        for old in entries[self.keep:]:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+def load_split(entry: str | Path, name: str, mmap: bool = True):
+    """(X, y) of one split; arrays are read-only memory maps when `mmap`."""
+    entry = Path(entry)
+    mode = "r" if mmap else None
+    with open(entry / "meta.json", "r", encoding="utf-8") as f:
+        shape = tuple(json.load(f)["shapes"][name])
+    parts = [np.load(entry / f"{name}_{p}.npy", mmap_mode=mode) for p in ("data", "indices", "indptr")]
+    X = sp.csr_matrix(tuple(parts), shape=shape, copy=False)
+    y = np.load(entry / f"{name}_y.npy", mmap_mode=mode)
+    return X, y
+
+
+def load_preprocessor(entry: str | Path):
+    return joblib.load(Path(entry) / "preprocessor.joblib")
@@ -0,0 +1,231 @@
+"""Incremental retraining on rows appended to the raw dataset.
+
+    python -m src.train.incremental          # learn from the appended rows
+    python -m src.train.incremental --full   # validate -> preprocess -> split -> train
+
+The preprocess state records the size and sha256 of the raw data consumed
+so far. While the raw file still starts with exactly those bytes, only
+the tail is read: it is cleaned with the persisted scaler statistics and
+duplicate digests, appended to the processed file, and its rows go to
+train/val/test through the salted hash split, so they keep their split
+on later runs whatever `split.method` produced the existing files. The
+model is then updated with `SGDClassifier(loss="log_loss").partial_fit` on
+the new training rows only, starting from the current coefficients (a
+LogisticRegression from `train.py` is converted on the first update). The
+fitted OneHotEncoder is kept, so categories first seen in appended rows
+are ignored until the next full refit.
+
+The appended rows first go through the checks of the validate stage
+against the reference profile; with `validate.fail_on_drift` a failing
+batch stops the run before anything is written. A rewritten or truncated
+raw file, a missing state or model, or `--full` runs the whole chain
+(validate included) instead, refitting the scaler on all rows. Incremental
+runs happen outside `dvc repro`, so `dvc status` reports the stages as
+changed until the next full run.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+
+import joblib
+import mlflow
+import numpy as np
+import pandas as pd
+import yaml
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import accuracy_score
+from sklearn.pipeline import Pipeline
+
+from src.data import perf, preprocess, split, validate
+from src.data.download import COLUMNS, raw_file
+from src.data.preprocess import DIGESTS_PATH, STATE_PATH, preprocess_delta, save_digests
+from src.data.schema import CLEAN_DTYPES, RAW_DTYPES
+from src.data.split import SPLITS, hashed_assign
+from src.data.state import PreprocessState
+from src.data.storage import append_frame, data_path, file_sha256, read_frame, storage_config
+from src.infer.fast_scorer import export_bundle
+from src.train import train
+from src.train.tracking import start_run
+
+TARGET = "income"
+MODEL_PATH = Path("models/model.joblib")
+
+def load_params(path: str = "params.yaml") -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+def append_offset(raw_path: Path, state: PreprocessState | None) -> int | None:
+    """Byte offset of the appended rows; None unless the raw file only grew."""
+    if state is None or state.raw_bytes is None or state.raw_sha256 is None:
+        return None
+    size = raw_path.stat().st_size
+    if size < state.raw_bytes:
+        return None
+    with open(raw_path, "rb") as f:
+        f.seek(max(state.raw_bytes - 1, 0))
+        # The old content must end on a complete line.
+        if state.raw_bytes and f.read(1) != b"\n":
+            return None
+    if file_sha256(raw_path, size=state.raw_bytes) != state.raw_sha256:
+        return None
+    return state.raw_bytes
+
+def read_delta(raw_path: Path, offset: int) -> pd.DataFrame:
+    with open(raw_path, "rb") as f:
+        f.seek(offset)
+        try:
+            return pd.read_csv(f, header=None, names=COLUMNS, dtype=RAW_DTYPES)
+        except pd.errors.EmptyDataError:
+            return pd.DataFrame(columns=COLUMNS)
+
+def as_sgd(model, cfg: dict, seed: int) -> SGDClassifier:
+    """An SGDClassifier continuing from `model`, with the step settings of `cfg`."""
+    step_params = {
+        "alpha": float(cfg.get("alpha", 1e-4)),
+        "learning_rate": cfg.get("learning_rate", "constant"),
+        "eta0": float(cfg.get("eta0", 0.001)),
+    }
+    if isinstance(model, SGDClassifier):
+        return model.set_params(**step_params)
+    penalty = getattr(model, "penalty", "l2")
+    sgd = SGDClassifier(
+        loss="log_loss",
+        penalty=penalty if penalty in ("l1", "l2", "elasticnet") else None,
+        random_state=seed,
+        **step_params,
+    )
+    # partial_fit keeps an existing coef_/intercept_ and only records
+    # classes_ on its first call.
+    sgd.coef_ = np.array(model.coef_, dtype=np.float64)
+    sgd.intercept_ = np.array(model.intercept_, dtype=np.float64)
+    return sgd
+
+def update_model(clf: Pipeline, rows: pd.DataFrame, cfg: dict, seed: int) -> Pipeline:
+    """`clf` with its model updated by `partial_fit` on `rows` (target included)."""
+    prep, model = clf.named_steps["prep"], clf.named_steps["model"]
+    classes = model.classes_
+    sgd = as_sgd(model, cfg, seed)
+    X = prep.transform(rows.drop(columns=[TARGET]))
+    y = rows[TARGET].to_numpy()
+    rng = np.random.default_rng(seed)
+    for _ in range(int(cfg.get("epochs", 5))):
+        order = rng.permutation(len(y))
+        sgd.partial_fit(X[order], y[order], classes=classes)
+    return Pipeline(steps=[("prep", prep), ("model", sgd)])
+
+def check_delta(delta: pd.DataFrame, cfg: dict) -> None:
+    """Run the validate checks on the appended rows; exit on failures if `fail_on_drift`."""
+    reference = validate.load_reference(validate.reference_path(cfg))
+    if reference is None:
+        print("[incremental] no reference profile, skipping the data checks")
+        return
+    with perf.step("validate") as s:
+        _, failures = validate.check_rows(delta, reference, cfg)
+        s.rows = len(delta)
+    for failure in failures:
+        print("[incremental] FAILED", failure)
+    if failures and cfg.get("fail_on_drift", True):
+        raise SystemExit(f"[incremental] {len(failures)} data check(s) failed on the appended rows, "
+                         "nothing was updated")
+
+def full_refit(reason: str) -> None:
+    print(f"[incremental] full refit: {reason}")
+    validate.main([])
+    preprocess.main(refit=True)
+    split.main()
+    train.main()
+
+@perf.profiled("incremental")
+def main() -> None:
+    params = load_params()
+    parser = argparse.ArgumentParser(description="Update the model from rows appended to the raw data")
+    parser.add_argument("--full", action="store_true",
+                        help="rerun validate, preprocess, split and train from scratch")
+    args = parser.parse_args()
+
+    fmt, compression = storage_config(params)
+    seed = int(params["seed"])
+    cfg = params["preprocess"]
+    split_cfg = params["split"]
+    inc_cfg = params.get("incremental", {})
+    raw_path = raw_file(params)
+
+    if args.full:
+        return full_refit("requested with --full")
+    if not (STATE_PATH.exists() and DIGESTS_PATH.exists() and MODEL_PATH.exists()):
+        return full_refit("no preprocess state, row digests or model yet")
+    try:
+        state = PreprocessState.load(STATE_PATH)
+    except ValueError as exc:
+        return full_refit(str(exc))
+    offset = append_offset(raw_path, state)
+    if offset is None:
+        return full_refit(f"{raw_path} was modified, not only appended to")
+
+    raw_size = raw_path.stat().st_size
+    if offset == raw_size:
+        print(f"[incremental] no new rows in {raw_path}")
+        return
+
+    with perf.step("read") as s:
+        delta = read_delta(raw_path, offset)
+        s.rows = len(delta)
+    check_delta(delta, params.get("validate", {}))
+    with perf.step("preprocess") as s:
+        clean, digests = preprocess_delta(delta, cfg, state, np.load(DIGESTS_PATH))
+        s.rows = len(clean)
+
+    ratios = (float(split_cfg["train_ratio"]), float(split_cfg["val_ratio"]), float(split_cfg["test_ratio"]))
+    assign = hashed_assign(clean, split_cfg.get("hash_columns"), ratios, seed) if len(clean) else np.zeros(0)
+    parts = {name: clean.iloc[np.flatnonzero(assign == k)] for k, name in enumerate(SPLITS)}
+    print(f"[incremental] {len(delta)} appended rows, {len(clean)} after cleaning: "
+          + ", ".join(f"{name}={len(part)}" for name, part in parts.items()))
+
+    clf = joblib.load(MODEL_PATH)
+    if len(parts["train"]):
+        with perf.step("fit") as s:
+            clf = update_model(clf, parts["train"], inc_cfg, seed)
+            s.rows = len(parts["train"])
+
+    # The state is saved last: if this run fails after appending, the same
+    # rows would be appended again, so recover with --full.
+    with perf.step("write") as s:
+        append_frame(clean, data_path("data/processed", "adult_clean", fmt), fmt, compression)
+        for name, part in parts.items():
+            if len(part):
+                append_frame(part, data_path("data/splits", name, fmt), fmt, compression)
+        s.rows = len(clean)
+
+    with perf.step("evaluate") as s:
+        test = read_frame(data_path("data/splits", "test", fmt), fmt, dtype=CLEAN_DTYPES)
+        acc = float(accuracy_score(test[TARGET], clf.predict(test.drop(columns=[TARGET]))))
+        s.rows = len(test)
+
+    joblib.dump(clf, MODEL_PATH)
+    bundle_dir = export_bundle(clf, Path("models/model_bundle"))
+    metrics_path = Path("reports/metrics.json")
+    metrics_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(metrics_path, "w", encoding="utf-8") as f:
+        json.dump({"test_accuracy": acc}, f, indent=2)
+
+    mlflow.set_tracking_uri("file:./mlruns")
+    mlflow.set_experiment("adult-income-dvc-mlflow")
+    with start_run() as run:
+        run.set_tag("mode", "incremental")
+        run.log_params({"seed": seed, "rows_appended": len(delta), "rows_train_added": len(parts["train"])})
+        run.log_metric("test_accuracy", acc)
+        run.log_artifacts(str(bundle_dir), "model_bundle")
+        perf.log_mlflow(logger=run)
+
+    state.raw_sha256 = file_sha256(raw_path)
+    state.raw_bytes = raw_size
+    save_digests(digests, DIGESTS_PATH)
+    state.save(STATE_PATH)
+    state.save(Path("models/preprocess_state.json"))
+    print("[incremental] test_accuracy =", acc)
+    print("[incremental] saved model:", MODEL_PATH)
+
+if __name__ == "__main__":
+    main()
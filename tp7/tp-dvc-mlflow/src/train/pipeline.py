@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from sklearn.compose import ColumnTransformer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+from sklearn.linear_model import LogisticRegression
+
+ENCODER_PREFIX = "encoder."
+
+
+def build_preprocessor(cat_cols: list[str], num_cols: list[str], encoder_params: dict | None = None) -> ColumnTransformer:
+    return ColumnTransformer(
+        transformers=[
+            ("cat", OneHotEncoder(handle_unknown="ignore", **(encoder_params or {})), cat_cols),
+            ("num", "passthrough", num_cols),
+        ]
+    )
+
+
+def build_model(seed: int, model_params: dict | None = None) -> LogisticRegression:
+    return LogisticRegression(**{"max_iter": 1000, "random_state": seed, **(model_params or {})})
+
+
+def build_pipeline(
+    cat_cols: list[str],
+    num_cols: list[str],
+    seed: int,
+    model_params: dict | None = None,
+    encoder_params: dict | None = None,
+) -> Pipeline:
+    return Pipeline(
+        steps=[
+            ("prep", build_preprocessor(cat_cols, num_cols, encoder_params)),
+            ("model", build_model(seed, model_params)),
+        ]
+    )
+
+
+def split_model_params(params: dict) -> tuple[dict, dict]:
+    """Split a flat parameter dict into (encoder_params, model_params).
+
+    Keys prefixed with ``encoder.`` go to the OneHotEncoder, the rest to
+    LogisticRegression; the string "none" stands for a `None` penalty.
+    """
+    encoder = {k[len(ENCODER_PREFIX):]: v for k, v in params.items() if k.startswith(ENCODER_PREFIX)}
+    model = {
+        k: None if v in ("none", "None") else v
+        for k, v in params.items() if not k.startswith(ENCODER_PREFIX)
+    }
+    if model.get("penalty") == "elasticnet":
+        model.setdefault("l1_ratio", 0.5)
+    return encoder, model
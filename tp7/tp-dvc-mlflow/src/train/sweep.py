@@ -0,0 +1,185 @@
+"""Hyperparameter sweep for the adult-income LogisticRegression pipeline.
+
+Search space keys are LogisticRegression parameters (`C`, `penalty`,
+`solver`, ...) or OneHotEncoder parameters prefixed with ``encoder.``
+(`encoder.min_frequency`, `encoder.max_categories`). The splits are
+encoded once per distinct encoder setting through the `FeatureStore`, and
+worker processes memory-map those matrices read-only, so candidates only
+pay for the model fit.
+
+Weak trials are stopped early by successive halving: every surviving trial
+is (warm-)fitted with the next `max_iter` budget, scored on the validation
+split, and only the best `keep_fraction` go on to the next budget.
+"""
+from __future__ import annotations
+
+import itertools
+import json
+import math
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from sklearn.exceptions import ConvergenceWarning
+
+from src.train.features import FeatureStore, load_split
+from src.train.pipeline import build_model, split_model_params
+from src.train.tracking import AsyncLogger, run_logger
+
+# Penalties each solver accepts (None = no regularization).
+SOLVER_PENALTIES = {
+    "lbfgs": {"l2", None},
+    "newton-cg": {"l2", None},
+    "newton-cholesky": {"l2", None},
+    "sag": {"l2", None},
+    "liblinear": {"l1", "l2"},
+    "saga": {"l1", "l2", "elasticnet", None},
+}
+
+# Per-process memo of memory-mapped (X_train, y_train, X_val, y_val) by
+# feature store entry.
+_DATA: dict = {}
+
+
+def is_valid(candidate: dict) -> bool:
+    _, model_params = split_model_params(candidate)
+    solver = model_params.get("solver", "lbfgs")
+    penalty = model_params.get("penalty", "l2")
+    return penalty in SOLVER_PENALTIES.get(solver, {penalty})
+
+
+def grid_candidates(space: dict) -> list[dict]:
+    keys = sorted(space)
+    values = [v if isinstance(v, list) else [v] for v in (space[k] for k in keys)]
+    return [dict(zip(keys, combo)) for combo in itertools.product(*values)]
+
+
+def random_candidates(space: dict, n_trials: int, seed: int) -> list[dict]:
+    """Sample `n_trials` candidates.
+
+    A list is sampled uniformly; ``{low, high, log}`` is a (log-)uniform
+    float range.
+    """
+    rng = np.random.default_rng(seed)
+    out = []
+    for _ in range(n_trials):
+        cand = {}
+        for key in sorted(space):
+            spec = space[key]
+            if isinstance(spec, dict):
+                low, high = float(spec["low"]), float(spec["high"])
+                if spec.get("log", False):
+                    cand[key] = float(math.exp(rng.uniform(math.log(low), math.log(high))))
+                else:
+                    cand[key] = float(rng.uniform(low, high))
+            elif isinstance(spec, list):
+                cand[key] = spec[int(rng.integers(len(spec)))]
+            else:
+                cand[key] = spec
+        out.append(cand)
+    return out
+
+
+def _load(entry: str):
+    if entry not in _DATA:
+        _DATA[entry] = (*load_split(entry, "train"), *load_split(entry, "val"))
+    return _DATA[entry]
+
+
+def _fit_rung(trial_id: int, entry: str, model_params: dict, max_iter: int, seed: int, model=None):
+    X_train, y_train, X_val, y_val = _load(entry)
+    if model is None:
+        model = build_model(seed, {**model_params, "warm_start": True})
+    model.set_params(max_iter=max_iter)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", ConvergenceWarning)
+        model.fit(X_train, y_train)
+    score = float((model.predict(X_val) == y_val).mean())
+    return trial_id, score, model
+
+
+def run_sweep(split_paths: dict, fmt: str | None, cfg: dict, seed: int, store: FeatureStore | None = None,
+              logger: AsyncLogger | None = None) -> dict:
+    """Run the sweep described by `cfg` and return the best candidate.
+
+    Every trial is logged as a run nested under `logger`'s run, or under
+    the active MLflow run, with its validation accuracy at each budget.
+    """
+    space = cfg["space"]
+    if cfg.get("search", "grid") == "random":
+        candidates = random_candidates(space, int(cfg.get("n_trials", 20)), seed)
+    else:
+        candidates = grid_candidates(space)
+    candidates = [c for c in candidates if is_valid(c)]
+    if not candidates:
+        raise ValueError("Sweep space has no valid solver/penalty combination")
+
+    es = cfg.get("early_stopping", {})
+    budgets = [int(b) for b in es.get("budgets", [1000])]
+    keep_fraction = float(es.get("keep_fraction", 0.5))
+    n_jobs = int(cfg.get("n_jobs", 1))
+
+    # Encode once per distinct encoder setting, not once per candidate.
+    store = store or FeatureStore()
+    trials = []
+    entries = {}
+    for cand in candidates:
+        encoder_params, model_params = split_model_params(cand)
+        enc_key = json.dumps(encoder_params, sort_keys=True)
+        if enc_key not in entries:
+            entries[enc_key] = str(store.get_or_build(split_paths, fmt, encoder_params))
+        trials.append({"params": cand, "entry": entries[enc_key], "model_params": model_params,
+                       "model": None, "scores": [], "status": "running"})
+    print(f"[sweep] {len(trials)} candidates, {len(entries)} encoded design matrices, budgets={budgets}")
+
+    alive = list(range(len(trials)))
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+        for rung, budget in enumerate(budgets):
+            futures = [
+                pool.submit(_fit_rung, i, trials[i]["entry"], trials[i]["model_params"],
+                            budget, seed, trials[i]["model"])
+                for i in alive
+            ]
+            for fut in futures:
+                i, score, model = fut.result()
+                trials[i]["model"] = model
+                trials[i]["scores"].append(score)
+
+            if rung < len(budgets) - 1:
+                ranked = sorted(alive, key=lambda i: trials[i]["scores"][-1], reverse=True)
+                n_keep = max(1, math.ceil(len(ranked) * keep_fraction))
+                for i in ranked[n_keep:]:
+                    trials[i]["status"] = f"stopped@{budget}"
+                alive = ranked[:n_keep]
+    for i in alive:
+        trials[i]["status"] = "completed"
+
+    with run_logger(logger) as log:
+        for i, trial in enumerate(trials):
+            child = log.child(f"trial-{i:03d}")
+            child.log_params({k: str(v) for k, v in trial["params"].items()})
+            for step, score in enumerate(trial["scores"]):
+                child.log_metric("val_accuracy", score, step=budgets[step])
+            child.set_tag("status", trial["status"])
+            child.end()
+
+    best = max(alive, key=lambda i: trials[i]["scores"][-1])
+    result = {
+        "best_params": trials[best]["params"],
+        "best_val_accuracy": trials[best]["scores"][-1],
+        "trials": [
+            {"params": t["params"], "val_accuracy": t["scores"], "status": t["status"]}
+            for t in trials
+        ],
+    }
+    print(f"[sweep] best val_accuracy={result['best_val_accuracy']:.4f} params={result['best_params']}")
+    return result
+
+
+def save_result(result: dict, path: str | Path = "reports/sweep.json") -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, default=str)
+    return path
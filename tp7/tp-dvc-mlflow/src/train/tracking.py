@@ -0,0 +1,226 @@
+"""Non-blocking, batched MLflow logging.
+
+Every `mlflow.log_*` call inside a run is a synchronous write to the
+tracking store, one file per value with the file store. `AsyncLogger`
+only enqueues the call: a background thread drains the queue, merges the
+queued params, metrics and tags of each run into `log_batch` requests
+(within MLflow's per-request limits) and uploads artifacts and models in
+the order they were logged. The calling code keeps the fluent API shape
+(`log_param`, `log_metrics`, `log_artifact`, ...), so `mlflow` itself can
+stand in where synchronous logging is wanted.
+
+The queue is drained before the run ends: `start_run` closes the logger
+on success and on failure, and an `atexit` hook closes loggers that were
+not closed explicitly. A write that fails in the background is re-raised
+by `flush`/`close`; on the failure path of `start_run` it is only printed,
+so it does not mask the original error. Files passed to `log_artifact`
+must not change until the logger is flushed.
+"""
+from __future__ import annotations
+
+import atexit
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator
+
+import mlflow
+from mlflow.entities import Metric, Param, RunTag
+from mlflow.tracking import MlflowClient
+from mlflow.utils.mlflow_tags import MLFLOW_PARENT_RUN_ID
+
+# MLflow rejects larger log_batch requests.
+MAX_METRICS = 1000
+MAX_PARAMS = 100
+MAX_TAGS = 100
+MAX_ENTITIES = 1000  # metrics + params + tags
+_CLOSE = object()
+
+
+class _Writer:
+    """Background thread applying queued writes to the tracking store."""
+
+    def __init__(self, client: MlflowClient) -> None:
+        self.client = client
+        self.queue: queue.Queue = queue.Queue()
+        self.error: BaseException | None = None
+        self.thread = threading.Thread(target=self._run, name="mlflow-writer", daemon=True)
+        self.thread.start()
+
+    def _run(self) -> None:
+        while True:
+            items = [self.queue.get()]
+            # Everything queued meanwhile goes into the same batches.
+            while True:
+                try:
+                    items.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._apply([item for item in items if item is not _CLOSE])
+            finally:
+                for _ in items:
+                    self.queue.task_done()
+            if any(item is _CLOSE for item in items):
+                return
+
+    def _apply(self, items: list) -> None:
+        batches: dict[str, dict[str, list]] = {}
+        for item in items:
+            if callable(item):
+                # Params and metrics logged before an upload are written first.
+                self._write_batches(batches)
+                batches = {}
+                self._guard(item)
+            else:
+                run_id, kind, entity = item
+                batches.setdefault(run_id, {"metrics": [], "params": [], "tags": []})[kind].append(entity)
+        self._write_batches(batches)
+
+    def _write_batches(self, batches: dict[str, dict[str, list]]) -> None:
+        for run_id, batch in batches.items():
+            metrics, params, tags = batch["metrics"], batch["params"], batch["tags"]
+            while metrics or params or tags:
+                n_params = min(len(params), MAX_PARAMS)
+                n_tags = min(len(tags), MAX_TAGS)
+                n_metrics = min(len(metrics), MAX_METRICS, MAX_ENTITIES - n_params - n_tags)
+                chunk = {"metrics": metrics[:n_metrics], "params": params[:n_params], "tags": tags[:n_tags]}
+                metrics, params, tags = metrics[n_metrics:], params[n_params:], tags[n_tags:]
+                self._guard(lambda: self.client.log_batch(run_id, **chunk))
+
+    def _guard(self, write: Callable[[], object]) -> None:
+        # Keep going after a failed write so one bad upload does not drop
+        # the rest; the first error is re-raised on flush/close.
+        try:
+            write()
+        except Exception as exc:  # noqa: BLE001
+            if self.error is None:
+                self.error = exc
+
+    def flush(self) -> None:
+        self.queue.join()
+        self.raise_error()
+
+    def close(self) -> None:
+        if self.thread.is_alive():
+            self.queue.put(_CLOSE)
+            self.thread.join()
+        self.raise_error()
+
+    def raise_error(self) -> None:
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+
+class AsyncLogger:
+    """Queue MLflow writes for `run_id` and apply them in the background."""
+
+    def __init__(self, run_id: str, client: MlflowClient | None = None, _writer: _Writer | None = None) -> None:
+        self.run_id = run_id
+        self._owner = _writer is None
+        self._writer = _writer or _Writer(client or MlflowClient())
+        if self._owner:
+            atexit.register(self.close)
+
+    @property
+    def client(self) -> MlflowClient:
+        return self._writer.client
+
+    def _put(self, kind: str, entity) -> None:
+        self._writer.queue.put((self.run_id, kind, entity))
+
+    def log_param(self, key: str, value) -> None:
+        self._put("params", Param(key, str(value)))
+
+    def log_params(self, params: dict) -> None:
+        for key, value in params.items():
+            self.log_param(key, value)
+
+    def log_metric(self, key: str, value: float, step: int | None = None) -> None:
+        self._put("metrics", Metric(key, float(value), int(time.time() * 1000), step or 0))
+
+    def log_metrics(self, metrics: dict, step: int | None = None) -> None:
+        for key, value in metrics.items():
+            self.log_metric(key, value, step)
+
+    def set_tag(self, key: str, value) -> None:
+        self._put("tags", RunTag(key, str(value)))
+
+    def set_tags(self, tags: dict) -> None:
+        for key, value in tags.items():
+            self.set_tag(key, value)
+
+    def log_artifact(self, local_path: str | Path, artifact_path: str | None = None) -> None:
+        self._writer.queue.put(lambda: self.client.log_artifact(self.run_id, str(local_path), artifact_path))
+
+    def log_artifacts(self, local_dir: str | Path, artifact_path: str | None = None) -> None:
+        self._writer.queue.put(lambda: self.client.log_artifacts(self.run_id, str(local_dir), artifact_path))
+
+    def log_model(self, sk_model, artifact_path: str) -> None:
+        """Save and upload a scikit-learn model like `mlflow.sklearn.log_model`."""
+        from mlflow.models import Model
+        import mlflow.sklearn
+
+        self._writer.queue.put(
+            lambda: Model.log(artifact_path=artifact_path, flavor=mlflow.sklearn, run_id=self.run_id, sk_model=sk_model)
+        )
+
+    def child(self, run_name: str) -> "AsyncLogger":
+        """A logger for a new run nested under this one, sharing the writer thread."""
+        experiment_id = self.client.get_run(self.run_id).info.experiment_id
+        run = self.client.create_run(experiment_id, tags={MLFLOW_PARENT_RUN_ID: self.run_id}, run_name=run_name)
+        return AsyncLogger(run.info.run_id, _writer=self._writer)
+
+    def end(self, status: str = "FINISHED") -> None:
+        """Mark a `child` run as terminated once its queued writes are done."""
+        self._writer.queue.put(lambda: self.client.set_terminated(self.run_id, status))
+
+    def flush(self) -> None:
+        """Block until every queued write is applied."""
+        self._writer.flush()
+
+    def close(self, raise_errors: bool = True) -> None:
+        """Apply the remaining writes and stop the writer thread."""
+        if not self._owner:
+            return self.flush() if raise_errors else None
+        atexit.unregister(self.close)
+        try:
+            self._writer.close()
+        except Exception as exc:  # noqa: BLE001
+            if raise_errors:
+                raise
+            print(f"[tracking] MLflow write failed: {exc!r}")
+
+
+@contextmanager
+def start_run(**kwargs) -> Iterator[AsyncLogger]:
+    """`mlflow.start_run` yielding an `AsyncLogger` that is flushed before the run ends."""
+    with mlflow.start_run(**kwargs) as run:
+        logger = AsyncLogger(run.info.run_id)
+        try:
+            yield logger
+        except BaseException:
+            logger.close(raise_errors=False)
+            raise
+        logger.close()
+
+
+@contextmanager
+def run_logger(logger: AsyncLogger | None = None) -> Iterator[AsyncLogger]:
+    """`logger`, or one for the active run that is closed on exit."""
+    if logger is not None:
+        yield logger
+        return
+    run = mlflow.active_run()
+    if run is None:
+        raise RuntimeError("No active MLflow run")
+    own = AsyncLogger(run.info.run_id)
+    try:
+        yield own
+    except BaseException:
+        own.close(raise_errors=False)
+        raise
+    own.close()
@@ -4,52 +4,79 @@ from pathlib import Path
 import json
 
 import yaml
-import pandas as pd
 
-from sklearn.compose import ColumnTransformer
-from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import OneHotEncoder
-from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import accuracy_score
 
 import joblib
 import mlflow
-import mlflow.sklearn
+from sklearn.pipeline import Pipeline
+
+from src.data import perf
+from src.data.cache import StageCache
+from src.data.state import PreprocessState
+from src.data.storage import data_path, read_frame, storage_config
+from src.infer.fast_scorer import MANIFEST, WEIGHTS, export_bundle
+from src.train import cv
+from src.train.features import FeatureStore, load_preprocessor, load_split
+from src.train.pipeline import build_model, split_model_params
+from src.train.sweep import run_sweep, save_result
+from src.train.tracking import start_run
 
 def load_params(path: str = "params.yaml") -> dict:
     with open(path, "r", encoding="utf-8") as f:
         return yaml.safe_load(f)
 
+@perf.profiled("train")
 def main() -> None:
     params = load_params()
     seed = int(params["seed"])
-
-    train_path = Path("data/splits/train.csv")
-    test_path = Path("data/splits/test.csv")
-
-    df_train = pd.read_csv(train_path)
-    df_test = pd.read_csv(test_path)
-
-    target = "income"
-    X_train, y_train = df_train.drop(columns=[target]), df_train[target]
-    X_test, y_test = df_test.drop(columns=[target]), df_test[target]
-
-    cat_cols = X_train.select_dtypes(include=["object"]).columns.tolist()
-    num_cols = [c for c in X_train.columns if c not in cat_cols]
-
-    preprocessor = ColumnTransformer(
-        transformers=[
-            ("cat", OneHotEncoder(handle_unknown="ignore"), cat_cols),
-            ("num", "passthrough", num_cols),
-        ]
+    fmt, _ = storage_config(params)
+
+    train_cfg = params.get("train", {})
+    sweep_cfg = params.get("sweep", {})
+    sweep = bool(sweep_cfg.get("enabled", False))
+    cv_cfg = params.get("cv", {})
+    cross_validate = bool(cv_cfg.get("enabled", False))
+
+    train_path = data_path("data/splits", "train", fmt)
+    val_path = data_path("data/splits", "val", fmt)
+    test_path = data_path("data/splits", "test", fmt)
+
+    state_path = Path("data/processed/preprocess_state.json")
+    model_path = Path("models/model.joblib")
+    bundle_dir = Path("models/model_bundle")
+    metrics_path = Path("reports/metrics.json")
+    outputs = [model_path, bundle_dir / MANIFEST, bundle_dir / WEIGHTS, metrics_path]
+    split_paths = {"train": train_path, "val": val_path, "test": test_path}
+    inputs = list(split_paths.values())
+    if sweep:
+        outputs.append(Path("reports/sweep.json"))
+    if cross_validate:
+        outputs.append(Path("reports/cv.json"))
+    if state_path.exists():
+        inputs.append(state_path)
+        outputs.append(Path("models/preprocess_state.json"))
+
+    cache = StageCache.from_params(params)
+    key = cache.key(
+        "train",
+        inputs=inputs,
+        params={
+            "seed": seed,
+            "storage": params.get("storage", {}),
+            "train": train_cfg,
+            "sweep": sweep_cfg if sweep else None,
+            "cv": cv_cfg if cross_validate else None,
+        },
+        code=[__file__, build_model, FeatureStore, run_sweep, cv, export_bundle, PreprocessState, read_frame],
     )
+    with perf.step("restore"):
+        restored = cache.restore(key, outputs)
+    if restored:
+        print(f"[train] restored cached model and metrics ({key[:12]}), no MLflow run logged")
+        return
 
-    clf = Pipeline(
-        steps=[
-            ("prep", preprocessor),
-            ("model", LogisticRegression(max_iter=1000, random_state=seed)),
-        ]
-    )
+    store = FeatureStore.from_params(params)
 
     mlflow.set_tracking_uri("file:./mlruns")
     mlflow.set_experiment("adult-income-dvc-mlflow")
@@ -57,27 +84,75 @@ def main() -> None:
     Path("models").mkdir(parents=True, exist_ok=True)
     Path("reports").mkdir(parents=True, exist_ok=True)
 
-    with mlflow.start_run():
-        mlflow.log_param("seed", seed)
-
-        clf.fit(X_train, y_train)
-        preds = clf.predict(X_test)
-        acc = accuracy_score(y_test, preds)
+    # Params, metrics and artifacts are written by a background thread;
+    # the run only ends once they are all in the tracking store.
+    with start_run() as run:
+        run.log_param("seed", seed)
+
+        candidate = dict(train_cfg.get("params") or {})
+        if sweep:
+            with perf.step("sweep"):
+                result = run_sweep(split_paths, fmt, sweep_cfg, seed, store, logger=run)
+            candidate.update(result["best_params"])
+            run.log_metric("best_val_accuracy", result["best_val_accuracy"])
+            run.log_artifact(str(save_result(result)))
+
+        encoder_params, model_params = split_model_params(candidate)
+        if candidate:
+            run.log_params({k: str(v) for k, v in candidate.items()})
+
+        # Encoded matrices are reused across runs: model-only changes skip
+        # reading the CSVs and refitting the OneHotEncoder.
+        with perf.step("features"):
+            entry = store.get_or_build(split_paths, fmt, encoder_params)
+            X_train, y_train = load_split(entry, "train")
+            X_test, y_test = load_split(entry, "test")
+
+        if cross_validate:
+            with perf.step("cv"):
+                run.log_artifact(str(cv.save_result(cv.run_cv(entry, model_params, cv_cfg, logger=run))))
+
+        with perf.step("fit") as s:
+            model = build_model(seed, model_params)
+            model.fit(X_train, y_train)
+            s.rows = X_train.shape[0]
+        clf = Pipeline(steps=[("prep", load_preprocessor(entry)), ("model", model)])
+        with perf.step("evaluate") as s:
+            preds = model.predict(X_test)
+            acc = accuracy_score(y_test, preds)
+            s.rows = X_test.shape[0]
+
+        run.log_metric("test_accuracy", float(acc))
+
+        with perf.step("save"):
+            joblib.dump(clf, model_path)
+            run.log_model(clf, "model")
+
+        if state_path.exists():
+            # Ship the fitted preprocessing state next to the model so that
+            # predict can apply it to raw rows.
+            state = PreprocessState.load(state_path)
+            model_state_path = state.save(Path("models/preprocess_state.json"))
+            run.log_param("preprocess_state_version", state.version)
+            run.log_param("raw_sha256", state.raw_sha256)
+            run.log_artifact(str(model_state_path))
+
+        # NumPy-only copy of the model for cold-starting scoring workers.
+        export_bundle(clf, bundle_dir)
+        run.log_artifacts(str(bundle_dir), "model_bundle")
 
-        mlflow.log_metric("test_accuracy", float(acc))
-
-        model_path = Path("models/model.joblib")
-        joblib.dump(clf, model_path)
-        mlflow.sklearn.log_model(clf, "model")
-
-        metrics_path = Path("reports/metrics.json")
         with open(metrics_path, "w", encoding="utf-8") as f:
             json.dump({"test_accuracy": float(acc)}, f, indent=2)
-        mlflow.log_artifact(str(metrics_path))
+        run.log_artifact(str(metrics_path))
+        # Upstream stage reports plus the train steps finished so far.
+        perf.log_mlflow(logger=run)
 
         print("[train] test_accuracy =", float(acc))
         print("[train] saved model:", model_path)
+        print("[train] saved model bundle:", bundle_dir)
         print("[train] saved metrics:", metrics_path)
 
+    cache.store(key, outputs)
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,43 @@
+from pathlib import Path
+
+import pandas as pd
+
+from src.bench.run import compare, scaling_exponents
+from src.bench.synthetic import read_sample, write_raw
+from src.data.download import COLUMNS
+from src.data.storage import read_frame
+
+SAMPLE = Path(__file__).resolve().parents[1] / "data" / "raw" / "adult.csv"
+
+
+def test_synthetic_raw_matches_download_layout(tmp_path):
+    sample = read_sample(SAMPLE).head(500)
+    out = write_raw(sample, tmp_path / "adult.data", n_rows=1200, seed=0)
+
+    assert not out.read_text().startswith("age,")
+    df = read_frame(out, "csv", names=COLUMNS)
+    assert len(df) == 1200
+    assert set(df["workclass"]) <= set(sample["workclass"])
+    assert df["age"].between(17, 90).all()
+    again = write_raw(sample, tmp_path / "again.data", n_rows=1200, seed=0)
+    pd.testing.assert_frame_equal(df, read_frame(again, "csv", names=COLUMNS))
+
+
+def test_compare_flags_only_regressions_beyond_tolerance():
+    base = {"x1": {"split": {"wall_s": 1.0, "peak_rss_mb": 100.0}}}
+    results = {
+        "x1": {"split": {"wall_s": 1.2, "peak_rss_mb": 140.0}},
+        "x10": {"split": {"wall_s": 9.0, "peak_rss_mb": 1.0}},
+    }
+
+    regressions = compare(results, base, tolerance=0.25)
+
+    assert len(regressions) == 1 and "peak_rss_mb" in regressions[0]
+
+
+def test_scaling_exponent_is_one_for_linear_stages():
+    results = {
+        "x1": {"split": {"rows": 100, "wall_s": 1.0}},
+        "x10": {"split": {"rows": 1000, "wall_s": 10.0}},
+    }
+    assert scaling_exponents(results) == {"split": 1.0}
@@ -0,0 +1,62 @@
+import os
+
+from src.data.cache import StageCache
+
+
+def make_inputs(tmp_path):
+    src = tmp_path / "input.csv"
+    src.write_text("a,b\n1,2\n")
+    code = tmp_path / "stage.py"
+    code.write_text("print('v1')\n")
+    return src, code
+
+
+def test_restore_returns_stored_outputs(tmp_path):
+    src, code = make_inputs(tmp_path)
+    out = tmp_path / "out" / "result.csv"
+    cache = StageCache(tmp_path / "cache")
+    key = cache.key("stage", [src], {"seed": 1}, [code])
+
+    assert not cache.restore(key, [out])
+    out.parent.mkdir()
+    out.write_text("result\n")
+    cache.store(key, [out])
+    out.unlink()
+
+    assert cache.restore(key, [out])
+    assert out.read_text() == "result\n"
+
+
+def test_key_changes_with_inputs_params_and_code(tmp_path):
+    src, code = make_inputs(tmp_path)
+    cache = StageCache(tmp_path / "cache")
+    base = cache.key("stage", [src], {"seed": 1}, [code])
+
+    assert cache.key("stage", [src], {"seed": 2}, [code]) != base
+    code.write_text("print('v2')\n")
+    assert cache.key("stage", [src], {"seed": 1}, [code]) != base
+    code.write_text("print('v1')\n")
+    src.write_text("a,b\n1,3\n")
+    assert cache.key("stage", [src], {"seed": 1}, [code]) != base
+
+
+def test_evicts_least_recently_used_entry(tmp_path):
+    cache = StageCache(tmp_path / "cache", max_size_mb=3.5 / 1024)  # room for three 1 KiB entries
+    out = tmp_path / "blob.bin"
+    keys = []
+    for i in range(3):
+        out.write_bytes(bytes(1024))
+        key = f"{i:02d}" * 32
+        cache.store(key, [out])
+        meta = cache._entry(key) / "meta.json"
+        os.utime(meta, (1000 + i, 1000 + i))
+        keys.append(key)
+
+    # touching the oldest entry makes the second one the LRU victim
+    assert cache.restore(keys[0], [out])
+    assert cache.evict() == []
+    out.write_bytes(bytes(1024))
+    cache.store("ff" * 32, [out])
+
+    assert cache.restore(keys[0], [out])
+    assert not cache.restore(keys[1], [out])
@@ -0,0 +1,41 @@
+from pathlib import Path
+
+import mlflow
+import numpy as np
+from sklearn.model_selection import cross_val_score
+
+from src.train.cv import fold_indices, run_cv
+from src.train.features import FeatureStore, load_split
+from src.train.pipeline import build_model
+
+SPLITS = Path(__file__).resolve().parents[1] / "data" / "splits"
+
+
+def test_folds_are_stratified_and_cover_every_row():
+    y = np.array(["a"] * 80 + ["b"] * 20)
+    folds = fold_indices(y, 5, seed=0)
+
+    held_out = np.concatenate([test for _, test in folds])
+    assert sorted(held_out) == list(range(100))
+    assert all((y[test] == "b").sum() == 4 for _, test in folds)
+    assert [t.tolist() for _, t in fold_indices(y, 5, seed=0)] == [t.tolist() for _, t in folds]
+
+
+def test_run_cv_matches_sklearn_and_logs_summary(tmp_path):
+    split_paths = {"train": SPLITS / "val.csv", "val": SPLITS / "test.csv", "test": SPLITS / "test.csv"}
+    entry = FeatureStore(tmp_path / "features").get_or_build(split_paths, "csv")
+    cfg = {"folds": 3, "seeds": [1, 2], "n_jobs": 2}
+
+    mlflow.set_tracking_uri(f"file:{tmp_path / 'mlruns'}")
+    with mlflow.start_run() as run:
+        result = run_cv(entry, {"C": 0.5}, cfg)
+
+    X, y = load_split(entry, "train", mmap=False)
+    expected = cross_val_score(build_model(1, {"C": 0.5}), X, y, cv=fold_indices(y, 3, seed=1))
+    got = [s["accuracy"] for s in result["scores"] if s["seed"] == 1]
+    np.testing.assert_allclose(got, expected)
+
+    assert len(result["scores"]) == 6
+    metrics = mlflow.get_run(run.info.run_id).data.metrics
+    assert np.isclose(metrics["cv_accuracy_mean"], result["cv_accuracy_mean"])
+    assert metrics["cv_accuracy_var"] == result["cv_accuracy_var"] > 0
@@ -0,0 +1,79 @@
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from src.data.download import COLUMNS, download
+from src.data.storage import read_frame
+
+BODY = b"".join(
+    f"{30 + i % 40}, Private, {100000 + i}, Bachelors, 13, Never-married, Sales, "
+    f"Not-in-family, White, Male, 0, 0, 40, United-States, <=50K\n".encode()
+    for i in range(2000)
+)
+SHA256 = hashlib.sha256(BODY).hexdigest()
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    ranges: list = []
+
+    def do_GET(self):
+        header = self.headers.get("Range")
+        RangeHandler.ranges.append(header)
+        start = int(header.split("=")[1].rstrip("-")) if header else 0
+        self.send_response(206 if header else 200)
+        self.send_header("Content-Length", str(len(BODY) - start))
+        self.end_headers()
+        self.wfile.write(BODY[start:])
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = HTTPServer(("127.0.0.1", 0), RangeHandler)
+    RangeHandler.ranges = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}/adult.data"
+    httpd.shutdown()
+
+
+def test_http_resumes_partial_file_with_range(server, tmp_path):
+    dest = tmp_path / "adult.data"
+    (tmp_path / "adult.data.part").write_bytes(BODY[:5000])
+
+    download(server, dest, sha256=SHA256, chunk_size=1024)
+
+    assert RangeHandler.ranges == ["bytes=5000-"]
+    assert dest.read_bytes() == BODY
+    assert not (tmp_path / "adult.data.part").exists()
+    df = read_frame(dest, "csv", names=COLUMNS)
+    assert list(df.columns) == COLUMNS and len(df) == 2000
+
+
+def test_file_url_resumes_and_skips_when_up_to_date(tmp_path):
+    mirror = tmp_path / "mirror.data"
+    mirror.write_bytes(BODY)
+    dest = tmp_path / "raw" / "adult.data"
+    dest.parent.mkdir()
+    (dest.parent / "adult.data.part").write_bytes(BODY[:123])
+
+    download(mirror.as_uri(), dest, sha256=SHA256)
+    assert dest.read_bytes() == BODY
+
+    mirror.unlink()
+    assert download(str(mirror), dest, sha256=SHA256) == dest
+
+
+def test_checksum_mismatch_keeps_nothing(tmp_path):
+    mirror = tmp_path / "mirror.data"
+    mirror.write_bytes(BODY)
+    dest = tmp_path / "adult.data"
+
+    with pytest.raises(ValueError, match="Checksum mismatch"):
+        download(str(mirror), dest, sha256="0" * 64)
+    assert not dest.exists()
+    assert not (tmp_path / "adult.data.part").exists()
@@ -0,0 +1,92 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.infer.fast_scorer import FastScorer, export_bundle, export_lookup
+from src.train.pipeline import build_pipeline
+
+ROOT = Path(__file__).resolve().parents[1]
+SPLITS = ROOT / "data" / "splits"
+TARGET = "income"
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    # train.csv is not versioned in git: fit on val.csv, score test.csv
+    df_fit = pd.read_csv(SPLITS / "val.csv")
+    X = df_fit.drop(columns=[TARGET])
+    cat_cols = X.select_dtypes(include=["object"]).columns.tolist()
+    num_cols = [c for c in X.columns if c not in cat_cols]
+    clf = build_pipeline(cat_cols, num_cols, seed=42)
+    clf.fit(X, df_fit[TARGET])
+    X_test = pd.read_csv(SPLITS / "test.csv").drop(columns=[TARGET])
+    return clf, X_test
+
+
+@pytest.fixture(scope="module")
+def scorer(fitted, tmp_path_factory):
+    clf, _ = fitted
+    path = export_lookup(clf, tmp_path_factory.mktemp("lookup") / "model_lookup.npz")
+    return FastScorer.load(path)
+
+
+def test_batch_parity_with_pipeline(fitted, scorer):
+    clf, X_test = fitted
+    expected = clf.predict_proba(X_test)
+    got = scorer.predict_proba({c: X_test[c].to_numpy() for c in X_test.columns})
+    np.testing.assert_allclose(got, expected, rtol=1e-9, atol=1e-12)
+    assert (scorer.predict({c: X_test[c].to_numpy() for c in X_test.columns}) == clf.predict(X_test)).all()
+
+
+def test_single_row_parity_with_pipeline(fitted, scorer):
+    clf, X_test = fitted
+    rows = X_test.head(200)
+    expected = clf.predict_proba(rows)
+    got = np.vstack([scorer.predict_proba_one(r) for r in rows.to_dict("records")])
+    np.testing.assert_allclose(got, expected, rtol=1e-9, atol=1e-12)
+
+
+def test_unknown_category_contributes_nothing(fitted, scorer):
+    _, X_test = fitted
+    row = X_test.iloc[0].to_dict()
+    row["native_country"] = " Atlantis"
+    clf_row = pd.DataFrame([row])
+    np.testing.assert_allclose(scorer.predict_proba_one(row), fitted[0].predict_proba(clf_row)[0])
+
+
+def test_scorer_does_not_import_pandas():
+    code = "import sys; import src.infer.fast_scorer; sys.exit('pandas' in sys.modules)"
+    assert subprocess.run([sys.executable, "-c", code], cwd=ROOT).returncode == 0
+
+
+def test_bundle_parity_and_numpy_only_load(fitted, scorer, tmp_path):
+    clf, X_test = fitted
+    bundle = export_bundle(clf, tmp_path / "bundle")
+    columns = {c: X_test[c].to_numpy() for c in X_test.columns}
+    np.testing.assert_array_equal(FastScorer.load(bundle).decision_function(columns), scorer.decision_function(columns))
+
+    code = (
+        "import sys; from src.infer.fast_scorer import FastScorer; "
+        f"FastScorer.load({str(bundle)!r}); "
+        "sys.exit(any(m in sys.modules for m in ('pandas', 'sklearn', 'scipy', 'joblib')))"
+    )
+    assert subprocess.run([sys.executable, "-c", code], cwd=ROOT).returncode == 0
+
+
+def test_parity_with_infrequent_categories(fitted, tmp_path):
+    _, X_test = fitted
+    df_fit = pd.read_csv(SPLITS / "val.csv")
+    X = df_fit.drop(columns=[TARGET])
+    cat_cols = X.select_dtypes(include=["object"]).columns.tolist()
+    num_cols = [c for c in X.columns if c not in cat_cols]
+    clf = build_pipeline(cat_cols, num_cols, seed=42, encoder_params={"min_frequency": 50})
+    clf.fit(X, df_fit[TARGET])
+
+    columns = {c: X_test[c].to_numpy() for c in X_test.columns}
+    for path in (export_lookup(clf, tmp_path / "lookup.npz"), export_bundle(clf, tmp_path / "bundle")):
+        got = FastScorer.load(path).predict_proba(columns)
+        np.testing.assert_allclose(got, clf.predict_proba(X_test), rtol=1e-9, atol=1e-12)
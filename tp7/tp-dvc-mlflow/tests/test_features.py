@@ -0,0 +1,65 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.data import schema
+from src.data.schema import CLEAN_DTYPES
+from src.train import features
+from src.train.features import FeatureStore, load_preprocessor, load_split
+
+SPLITS = Path(__file__).resolve().parents[1] / "data" / "splits"
+
+
+def make_splits(tmp_path):
+    df = pd.read_csv(SPLITS / "val.csv")
+    paths = {}
+    for name, part in zip(("train", "val", "test"), np.array_split(df, 3)):
+        paths[name] = tmp_path / f"{name}.csv"
+        part.to_csv(paths[name], index=False)
+    return paths
+
+
+def test_entry_is_reused_and_memory_mapped(tmp_path):
+    paths = make_splits(tmp_path)
+    store = FeatureStore(tmp_path / "features")
+
+    entry = store.get_or_build(paths, "csv")
+    mtime = (entry / "train_data.npy").stat().st_mtime
+    assert store.get_or_build(paths, "csv") == entry
+    assert (entry / "train_data.npy").stat().st_mtime == mtime
+
+    X, y = load_split(entry, "test")
+    df = pd.read_csv(paths["test"], dtype=CLEAN_DTYPES)
+    expected = load_preprocessor(entry).transform(df.drop(columns=["income"]))
+    assert not X.data.flags.writeable
+    np.testing.assert_array_equal(X.toarray(), expected.toarray())
+    assert (y == df["income"].to_numpy()).all()
+
+
+def test_key_depends_on_encoder_params_and_split_content(tmp_path):
+    paths = make_splits(tmp_path)
+    store = FeatureStore(tmp_path / "features", keep=1)
+
+    base = store.key(paths, None)
+    assert store.key(paths, {"min_frequency": 20}) != base
+    paths["val"].write_text(paths["val"].read_text() + paths["val"].read_text().splitlines()[1] + "\n")
+    assert store.key(paths, None) != base
+
+    store.get_or_build(paths, "csv")
+    store.get_or_build(paths, "csv", {"min_frequency": 20})
+    assert len(list((tmp_path / "features").iterdir())) == 1
+
+
+def test_key_depends_on_the_encoding_code(tmp_path, monkeypatch):
+    paths = make_splits(tmp_path)
+    store = FeatureStore(tmp_path / "features")
+    base = store.key(paths, None)
+
+    for module in (features, schema):
+        edited = tmp_path / f"{module.__name__}.py"
+        edited.write_text(Path(module.__file__).read_text() + "\n# edited\n")
+        with monkeypatch.context() as m:
+            m.setattr(module, "__file__", str(edited))
+            assert store.key(paths, None) != base
+    assert store.key(paths, None) == base
@@ -0,0 +1,157 @@
+from pathlib import Path
+
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data import preprocess, validate
+from src.data.download import COLUMNS
+from src.data.preprocess import preprocess_delta, preprocess_in_memory
+from src.data.state import PreprocessState
+from src.data.storage import file_sha256
+from src.train import incremental
+from src.train.incremental import append_offset, read_delta, update_model
+from src.train.pipeline import build_pipeline
+
+ROOT = Path(__file__).resolve().parents[1]
+RAW = ROOT / "data" / "raw" / "adult.csv"
+SPLITS = ROOT / "data" / "splits"
+CFG = {"drop_duplicates": True, "drop_missing": True}
+
+
+def write_raw(path, df):
+    df.to_csv(path, header=False, index=False, mode="a" if path.exists() else "w")
+
+
+def test_append_offset_only_for_pure_appends(tmp_path):
+    raw = tmp_path / "adult.data"
+    df = pd.read_csv(RAW, nrows=300)
+    write_raw(raw, df.head(200))
+    state = PreprocessState([], [], [], {}, raw_sha256=file_sha256(raw), raw_bytes=raw.stat().st_size)
+
+    assert append_offset(raw, state) == state.raw_bytes
+    write_raw(raw, df.tail(100))
+    assert append_offset(raw, state) == state.raw_bytes
+    assert len(read_delta(raw, state.raw_bytes)) == 100
+
+    raw.write_bytes(b"x" + raw.read_bytes()[1:])
+    assert append_offset(raw, state) is None
+    raw.write_bytes(raw.read_bytes()[: state.raw_bytes - 10])
+    assert append_offset(raw, state) is None
+
+
+def test_read_delta_keeps_blank_numeric_cells_as_missing(tmp_path):
+    raw = tmp_path / "adult.data"
+    df = pd.read_csv(RAW, nrows=20)
+    df.loc[3, "age"] = None
+    write_raw(raw, df)
+    delta = read_delta(raw, 0)
+    assert delta["age"].isna().tolist() == [i == 3 for i in range(20)]
+
+
+def test_delta_matches_full_preprocessing(tmp_path):
+    df = pd.read_csv(RAW, nrows=4000)
+    raw = tmp_path / "adult.data"
+    write_raw(raw, df.head(3000))
+    digests = tmp_path / "digests.npy"
+    state = preprocess_in_memory(raw, tmp_path / "head.csv", "csv", "zstd", CFG,
+                                 raw_names=COLUMNS, digests_path=digests)
+
+    # Appended rows repeat some old rows and themselves.
+    delta = pd.concat([df.iloc[3000:], df.iloc[:50], df.iloc[3000:3010]], ignore_index=True)
+    clean, seen = preprocess_delta(delta, CFG, state, np.load(digests))
+
+    write_raw(raw, delta)
+    preprocess_in_memory(raw, tmp_path / "full.csv", "csv", "zstd", CFG, state=state, raw_names=COLUMNS)
+    head = pd.read_csv(tmp_path / "head.csv")
+    expected = pd.read_csv(tmp_path / "full.csv").iloc[len(head):].reset_index(drop=True)
+    clean.to_csv(tmp_path / "delta.csv", index=False)
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / "delta.csv"), expected)
+    assert len(seen) > len(np.load(digests))
+
+
+def test_preprocess_refits_after_incremental_updates(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    shutil.copy(ROOT / "params.yaml", tmp_path)
+    raw = tmp_path / "data" / "raw" / "adult.data"
+    raw.parent.mkdir(parents=True)
+    df = pd.read_csv(RAW, nrows=4000)
+    write_raw(raw, df.head(1000))
+    preprocess.main()
+    fitted = PreprocessState.load(preprocess.STATE_PATH)
+
+    # What an incremental run leaves behind: the appended rows are consumed,
+    # the scaler statistics are still those of the first 1000 rows.
+    write_raw(raw, df.tail(3000))
+    state = PreprocessState.load(preprocess.STATE_PATH)
+    state.raw_sha256, state.raw_bytes = file_sha256(raw), raw.stat().st_size
+    state.save(preprocess.STATE_PATH)
+    assert not state.is_fresh(file_sha256(raw), state.params)
+
+    preprocess.main()
+    refitted = PreprocessState.load(preprocess.STATE_PATH)
+    assert refitted.fit_sha256 == refitted.raw_sha256 == file_sha256(raw)
+    assert not np.allclose(refitted.mean, fitted.mean)
+
+    # --full refits even when the state matches the raw file.
+    refitted.mean = np.zeros_like(refitted.mean)
+    refitted.save(preprocess.STATE_PATH)
+    shutil.rmtree(tmp_path / ".cache")
+    preprocess.main(refit=True)
+    assert not np.allclose(PreprocessState.load(preprocess.STATE_PATH).mean, 0.0)
+
+
+def test_update_model_starts_from_logistic_regression_coefficients():
+    df = pd.read_csv(SPLITS / "val.csv")
+    X = df.drop(columns=["income"])
+    cat_cols = X.select_dtypes(include=["object"]).columns.tolist()
+    clf = build_pipeline(cat_cols, [c for c in X.columns if c not in cat_cols], seed=42)
+    clf.fit(X, df["income"])
+    coef = clf.named_steps["model"].coef_.copy()
+
+    new_rows = pd.read_csv(SPLITS / "test.csv").head(500)
+    tiny = update_model(clf, new_rows, {"epochs": 1, "eta0": 1e-9}, seed=0)
+    np.testing.assert_allclose(tiny.named_steps["model"].coef_, coef, atol=1e-5)
+    assert (tiny.predict(X) == clf.predict(X)).mean() > 0.999
+
+    updated = update_model(tiny, new_rows, {"epochs": 3, "eta0": 0.01}, seed=0)
+    assert not np.allclose(updated.named_steps["model"].coef_, coef)
+    assert list(updated.named_steps["model"].classes_) == list(clf.named_steps["model"].classes_)
+
+
+def test_drifted_append_is_rejected_before_anything_is_updated(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    shutil.copy(ROOT / "params.yaml", tmp_path)
+    raw = tmp_path / "data" / "raw" / "adult.data"
+    raw.parent.mkdir(parents=True)
+    df = pd.read_csv(RAW, nrows=4000)
+    write_raw(raw, df.head(3000))
+    validate.save_json(validate.build_profile(raw, chunk_size=1000), validate.reference_path({}))
+    preprocess.main()
+    (tmp_path / "models").mkdir()
+    (tmp_path / "models" / "model.joblib").write_bytes(b"")
+    state = preprocess.STATE_PATH.read_bytes()
+
+    cfg = {"max_null_rate": 0.1, "psi_threshold": 0.2, "ks_threshold": 0.1}
+    reference = validate.load_reference(validate.reference_path({}))
+    assert validate.check_rows(read_delta(raw, 0), reference, cfg)[1] == []
+
+    shifted = df.tail(1000).assign(age=lambda d: d["age"] + 20)
+    write_raw(raw, shifted)
+    monkeypatch.setattr(sys, "argv", ["incremental"])
+    with pytest.raises(SystemExit, match="failed on the appended rows"):
+        incremental.main()
+    assert preprocess.STATE_PATH.read_bytes() == state
+
+
+def test_full_refit_validates_first(monkeypatch):
+    calls = []
+    monkeypatch.setattr(validate, "main", lambda argv=None: calls.append("validate"))
+    monkeypatch.setattr(preprocess, "main", lambda refit=False: calls.append(("preprocess", refit)))
+    monkeypatch.setattr(incremental.split, "main", lambda: calls.append("split"))
+    monkeypatch.setattr(incremental.train, "main", lambda: calls.append("train"))
+    incremental.full_refit("test")
+    assert calls == ["validate", ("preprocess", True), "split", "train"]
@@ -0,0 +1,41 @@
+import json
+
+import numpy as np
+
+from src.data import perf
+
+
+def test_profiled_writes_per_step_report(tmp_path, monkeypatch):
+    monkeypatch.setattr(perf, "PERF_DIR", tmp_path)
+
+    @perf.profiled("demo")
+    def main():
+        for chunk in perf.profile_iter("read", [np.zeros(10), np.zeros(5)]):
+            with perf.step("scale") as s:
+                s.rows = len(chunk)
+        with perf.step("alloc"):
+            block = np.ones(64 * 1024 * 1024 // 8)
+            block.sum()
+        return "done"
+
+    assert main() == "done"
+
+    report = json.loads((tmp_path / "demo.json").read_text())
+    assert set(report) == {"total", "read", "scale", "alloc"}
+    assert report["scale"]["calls"] == 2 and report["scale"]["rows"] == 15
+    assert report["read"]["rows"] == 15
+    assert report["total"]["wall_s"] >= report["alloc"]["wall_s"]
+    assert report["alloc"]["peak_rss_mb"] >= 64
+    assert report["total"]["peak_rss_mb"] >= report["alloc"]["peak_rss_mb"]
+    assert perf._ACTIVE is None
+
+
+def test_step_is_a_no_op_outside_a_stage():
+    with perf.step("read") as s:
+        s.rows = 3
+    assert list(perf.profile_iter("read", [[1], [2, 3]])) == [[1], [2, 3]]
+
+
+def test_flatten_names_metrics_by_stage_and_step():
+    metrics = perf.flatten("split", {"read": {"wall_s": 0.5, "rows": 10}})
+    assert metrics == {"perf.split.read.wall_s": 0.5, "perf.split.read.rows": 10.0}
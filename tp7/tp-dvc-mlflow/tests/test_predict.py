@@ -0,0 +1,116 @@
+import json
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.download import COLUMNS
+from src.data.preprocess import preprocess_in_memory
+from src.data.state import PreprocessState
+from src.infer import predict
+from src.train.pipeline import build_pipeline
+
+ROOT = Path(__file__).resolve().parents[1]
+SPLITS = ROOT / "data" / "splits"
+RAW = ROOT / "data" / "raw" / "adult.csv"
+CFG = {"drop_duplicates": True, "drop_missing": True}
+TARGET = "income"
+
+
+def fit_model(path, df):
+    X = df.drop(columns=[TARGET])
+    cat_cols = X.select_dtypes(include=["object"]).columns.tolist()
+    clf = build_pipeline(cat_cols, [c for c in X.columns if c not in cat_cols], seed=42)
+    clf.fit(X, df[TARGET])
+    return Path(joblib.dump(clf, path)[0])
+
+
+@pytest.fixture
+def model_path(tmp_path):
+    return fit_model(tmp_path / "model.joblib", pd.read_csv(SPLITS / "val.csv"))
+
+
+def run(model_path, in_path, tmp_path, shards=4):
+    return predict.predict_shards(model_path, in_path, tmp_path / "shards", tmp_path / "manifest.json",
+                                  shards, chunk_size=700)
+
+
+def test_shards_cover_the_input_like_a_single_file(model_path, tmp_path):
+    in_path = SPLITS / "test.csv"
+    stats = run(model_path, in_path, tmp_path)
+    predict.predict_file(model_path, in_path, tmp_path / "single.csv", chunk_size=700)
+
+    parts = pd.concat(pd.read_csv(p) for p in sorted((tmp_path / "shards").glob("part-*.csv")))
+    parts = parts.sort_values("row").reset_index(drop=True)
+    assert stats["rescored"] == [0, 1, 2, 3]
+    assert parts["row"].tolist() == list(range(len(parts)))
+    pd.testing.assert_frame_equal(parts.drop(columns="row"), pd.read_csv(tmp_path / "single.csv"))
+
+    manifest = json.loads((tmp_path / "manifest.json").read_text())
+    assert sum(e["rows"] for e in manifest["shards"]) == manifest["rows"] == len(parts)
+
+
+def test_rerun_only_rescores_changed_shards(model_path, tmp_path):
+    in_path = tmp_path / "input.csv"
+    df = pd.read_csv(SPLITS / "test.csv")
+    df.to_csv(in_path, index=False)
+    run(model_path, in_path, tmp_path)
+    before = {p.name: p.read_bytes() for p in (tmp_path / "shards").glob("part-*.csv")}
+
+    assert run(model_path, in_path, tmp_path)["rescored"] == []
+
+    df.loc[10, "age"] += 1.0
+    df.to_csv(in_path, index=False)
+    rescored = run(model_path, in_path, tmp_path)["rescored"]
+    assert 1 <= len(rescored) <= 2
+    after = {p.name: p.read_bytes() for p in (tmp_path / "shards").glob("part-*.csv")}
+    unchanged = [name for name in after if int(name[5:9]) not in rescored]
+    assert unchanged and all(after[name] == before[name] for name in unchanged)
+
+    # A modified or missing output is rescored as well.
+    (tmp_path / "shards" / unchanged[0]).write_text("row,prediction\n")
+    assert run(model_path, in_path, tmp_path)["rescored"] == [int(unchanged[0][5:9])]
+
+
+def test_shard_count_change_rescores_and_drops_extra_parts(model_path, tmp_path):
+    run(model_path, SPLITS / "test.csv", tmp_path, shards=4)
+    assert run(model_path, SPLITS / "test.csv", tmp_path, shards=2)["rescored"] == [0, 1]
+    assert sorted(p.name for p in (tmp_path / "shards").iterdir()) == ["part-0000.csv", "part-0001.csv"]
+
+
+def test_each_call_scores_with_its_own_model_and_state(model_path, tmp_path):
+    in_path = SPLITS / "test.csv"
+    other = fit_model(tmp_path / "other.joblib", pd.read_csv(in_path).head(300))
+    predict.predict_file(model_path, in_path, tmp_path / "a.csv")
+    predict.predict_file(other, in_path, tmp_path / "b.csv")
+
+    expected = joblib.load(other).predict_proba(pd.read_csv(in_path).drop(columns=[TARGET]))
+    got = pd.read_csv(tmp_path / "b.csv").filter(like="proba_").to_numpy()
+    np.testing.assert_allclose(got, expected, rtol=1e-6)
+    assert (tmp_path / "a.csv").read_bytes() != (tmp_path / "b.csv").read_bytes()
+
+    state = PreprocessState(["age"], [40.0], [10.0], {})
+    predict.load_state(state.save(tmp_path / "state.json"))
+    assert predict.load_state(None) is None and predict._STATE is None
+
+
+def test_raw_input_in_the_download_layout(tmp_path):
+    raw = tmp_path / "adult.data"
+    pd.read_csv(RAW, nrows=3000).to_csv(raw, header=False, index=False)
+    clean = tmp_path / "clean.csv"
+    state = preprocess_in_memory(raw, clean, "csv", "zstd", CFG, raw_names=COLUMNS)
+    state_path = state.save(tmp_path / "state.json")
+    model_path = fit_model(tmp_path / "model.joblib", pd.read_csv(clean))
+
+    predict.predict_file(model_path, raw, tmp_path / "single.csv", chunk_size=700, state_path=state_path)
+    stats = predict.predict_shards(model_path, raw, tmp_path / "shards", tmp_path / "manifest.json", 3,
+                                   chunk_size=700, state_path=state_path)
+
+    rows = PreprocessState.load(state_path).transform(pd.read_csv(raw, header=None, names=COLUMNS))
+    expected = joblib.load(model_path).predict_proba(rows.drop(columns=[TARGET]))
+    single = pd.read_csv(tmp_path / "single.csv")
+    np.testing.assert_allclose(single.filter(like="proba_").to_numpy(), expected, rtol=1e-6)
+    parts = pd.concat(pd.read_csv(p) for p in sorted((tmp_path / "shards").glob("part-*.csv")))
+    assert stats["rows"] == len(rows) == len(parts.drop_duplicates("row"))
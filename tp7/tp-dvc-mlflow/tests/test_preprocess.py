@@ -0,0 +1,77 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src.data.download import COLUMNS
+from src.data.preprocess import preprocess_in_memory, preprocess_streaming
+from src.data.schema import CLEAN_DTYPES
+from src.data.state import PreprocessState
+from src.data.storage import read_frame, write_frame
+
+RAW = Path(__file__).resolve().parents[1] / "data" / "raw" / "adult.csv"
+CFG = {"drop_duplicates": True, "drop_missing": True, "chunk_size": 997}
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet", "feather"])
+def test_streaming_matches_in_memory(tmp_path, fmt):
+    raw = write_frame(pd.read_csv(RAW, nrows=8000), tmp_path / f"raw.{fmt}", fmt)
+    expected_path = tmp_path / f"expected.{fmt}"
+    got_path = tmp_path / f"got.{fmt}"
+
+    preprocess_in_memory(raw, expected_path, fmt, "zstd", CFG)
+    preprocess_streaming(raw, got_path, fmt, "zstd", CFG)
+
+    expected = read_frame(expected_path, dtype=CLEAN_DTYPES).reset_index(drop=True)
+    got = read_frame(got_path, dtype=CLEAN_DTYPES)
+    pd.testing.assert_frame_equal(got, expected, check_categorical=False, rtol=1e-9)
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "feather"])
+def test_streaming_from_the_download_layout(tmp_path, fmt):
+    # Chunks read from csv carry their own category dictionaries.
+    raw = tmp_path / "adult.data"
+    pd.read_csv(RAW, nrows=8000).to_csv(raw, header=False, index=False)
+    expected_path = tmp_path / f"expected.{fmt}"
+    got_path = tmp_path / f"got.{fmt}"
+
+    preprocess_in_memory(raw, expected_path, fmt, "zstd", CFG, raw_names=COLUMNS)
+    preprocess_streaming(raw, got_path, fmt, "zstd", CFG, raw_names=COLUMNS)
+
+    expected = read_frame(expected_path, dtype=CLEAN_DTYPES).reset_index(drop=True)
+    got = read_frame(got_path, dtype=CLEAN_DTYPES)
+    pd.testing.assert_frame_equal(got, expected, check_categorical=False, rtol=1e-9)
+
+
+def test_streaming_drops_duplicates_across_chunks(tmp_path):
+    df = pd.read_csv(RAW, nrows=50)
+    raw = write_frame(pd.concat([df, df]), tmp_path / "raw.csv", "csv")
+    out = tmp_path / "out.csv"
+
+    preprocess_streaming(raw, out, "csv", "zstd", {**CFG, "chunk_size": 30})
+
+    assert len(read_frame(out)) == len(df.replace(" ?", pd.NA).dropna().drop_duplicates())
+
+
+def test_saved_state_reproduces_fit(tmp_path):
+    raw = write_frame(pd.read_csv(RAW, nrows=3000), tmp_path / "raw.csv", "csv")
+    fitted_out, reused_out = tmp_path / "fitted.csv", tmp_path / "reused.csv"
+
+    state = preprocess_in_memory(raw, fitted_out, "csv", "zstd", CFG)
+    state = PreprocessState.load(state.save(tmp_path / "state.json"))
+    preprocess_in_memory(raw, reused_out, "csv", "zstd", CFG, state=state)
+
+    pd.testing.assert_frame_equal(read_frame(reused_out), read_frame(fitted_out))
+
+
+def test_state_transform_matches_processed_rows(tmp_path):
+    df = pd.read_csv(RAW, nrows=3000)
+    raw = write_frame(df, tmp_path / "raw.csv", "csv")
+    out = tmp_path / "out.csv"
+
+    state = preprocess_in_memory(raw, out, "csv", "zstd", CFG)
+    kept = df.replace(" ?", pd.NA).dropna().drop_duplicates().index
+
+    pd.testing.assert_frame_equal(
+        state.transform(df.loc[kept]).reset_index(drop=True), read_frame(out), check_dtype=False
+    )
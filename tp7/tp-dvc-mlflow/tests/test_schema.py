@@ -0,0 +1,53 @@
+from pathlib import Path
+
+import pandas as pd
+
+import pytest
+
+from src.data.preprocess import preprocess_in_memory, preprocess_streaming
+from src.data.schema import CLEAN_DTYPES, RAW_DTYPES, apply_dtypes
+from src.data.storage import read_frame
+
+RAW = Path(__file__).resolve().parents[1] / "data" / "raw" / "adult.csv"
+CFG = {"drop_duplicates": True, "drop_missing": True}
+
+
+def test_declared_dtypes_shrink_the_raw_frame():
+    default = pd.read_csv(RAW, nrows=5000)
+    typed = read_frame(RAW, "csv", dtype=RAW_DTYPES).head(5000)
+
+    assert str(typed["workclass"].dtype) == "category"
+    assert str(typed["age"].dtype) == "float32"
+    pd.testing.assert_frame_equal(typed.astype(default.dtypes.to_dict()), default)
+    assert typed.memory_usage(deep=True).sum() * 4 < default.memory_usage(deep=True).sum()
+
+
+def test_preprocess_output_reads_back_with_the_clean_dtypes(tmp_path):
+    out = tmp_path / "clean.csv"
+    preprocess_in_memory(RAW, out, "csv", "zstd", CFG)
+
+    df = read_frame(out, dtype=CLEAN_DTYPES)
+    assert {c: str(t) for c, t in df.dtypes.items()} == CLEAN_DTYPES
+    assert " ?" not in df["occupation"].cat.categories
+
+
+@pytest.mark.parametrize("run", [preprocess_in_memory, preprocess_streaming])
+def test_blank_numeric_cell_is_dropped_as_missing(tmp_path, run):
+    df = pd.read_csv(RAW, nrows=500)
+    df.drop(index=7).to_csv(tmp_path / "without.csv", index=False)
+    df.loc[7, "age"] = None
+    df.to_csv(tmp_path / "blank.csv", index=False)
+
+    cfg = {**CFG, "chunk_size": 100}
+    run(tmp_path / "blank.csv", tmp_path / "blank_clean.csv", "csv", "zstd", cfg)
+    run(tmp_path / "without.csv", tmp_path / "without_clean.csv", "csv", "zstd", cfg)
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / "blank_clean.csv"),
+                                  pd.read_csv(tmp_path / "without_clean.csv"))
+
+
+def test_apply_dtypes_skips_absent_and_matching_columns():
+    df = pd.DataFrame({"age": [0.5, -1.0], "extra": ["a", "b"]})
+    typed = apply_dtypes(df)
+    assert str(typed["age"].dtype) == "float32"
+    assert typed["extra"].dtype == object
+    assert apply_dtypes(typed) is typed
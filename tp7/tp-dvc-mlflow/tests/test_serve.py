@@ -0,0 +1,99 @@
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.infer.serve import MicroBatcher, create_app
+from src.train.pipeline import build_pipeline
+
+SPLITS = Path(__file__).resolve().parents[1] / "data" / "splits"
+TARGET = "income"
+
+
+@pytest.fixture(scope="module")
+def clf():
+    # train.csv is not versioned in git: fit on val.csv
+    df = pd.read_csv(SPLITS / "val.csv")
+    X = df.drop(columns=[TARGET])
+    cat_cols = X.select_dtypes(include=["object"]).columns.tolist()
+    clf = build_pipeline(cat_cols, [c for c in X.columns if c not in cat_cols], seed=42)
+    return clf.fit(X, df[TARGET])
+
+
+@pytest.fixture
+def rows():
+    return pd.read_csv(SPLITS / "test.csv", nrows=20).drop(columns=[TARGET]).to_dict("records")
+
+
+def post_concurrently(app, payloads):
+    responses = [None] * len(payloads)
+    barrier = threading.Barrier(len(payloads))
+
+    def send(i):
+        client = app.test_client()
+        barrier.wait()
+        responses[i] = client.post("/predict", json=payloads[i])
+
+    threads = [threading.Thread(target=send, args=(i,)) for i in range(len(payloads))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return responses
+
+
+def test_concurrent_requests_are_coalesced_and_match_predict_proba(clf, rows):
+    app = create_app({"model": clf, "max_wait_ms": 50})
+    responses = post_concurrently(app, rows)
+
+    assert all(r.status_code == 200 for r in responses)
+    expected = clf.predict_proba(pd.DataFrame(rows))
+    got = [[r.get_json()["probabilities"][0][str(c).strip()] for c in clf.classes_] for r in responses]
+    np.testing.assert_allclose(got, expected, rtol=1e-12)
+
+    metrics = app.test_client().get("/metrics").get_json()
+    assert metrics["rows"] == len(rows)
+    assert metrics["batches"] < len(rows)
+    assert metrics["latency"]["count"] == len(rows)
+    assert metrics["mean_batch_rows"] == len(rows) / metrics["batches"]
+
+
+def test_bad_request_gets_400_without_failing_the_others(clf, rows):
+    app = create_app({"model": clf, "max_wait_ms": 50})
+    rows[3]["age"] = "abc"
+    responses = post_concurrently(app, rows)
+
+    assert responses[3].status_code == 400
+    assert "age" in responses[3].get_json()["error"]
+    assert [i for i, r in enumerate(responses) if r.status_code != 200] == [3]
+
+    client = app.test_client()
+    assert client.post("/predict", json={**rows[0], "sex": 1}).status_code == 400
+    assert client.post("/predict", json=[]).status_code == 400
+
+
+def test_failed_batch_is_rescored_request_by_request(clf, rows):
+    batcher = MicroBatcher(clf, max_wait_ms=50)
+    frames = [pd.DataFrame.from_records([row], columns=batcher.columns) for row in rows[:6]]
+    # Skip the request-side checks to make the whole batch fail.
+    frames[2]["age"] = "abc"
+    results = [None] * len(frames)
+
+    def submit(i):
+        try:
+            results[i] = batcher.submit(frames[i])
+        except Exception as exc:
+            results[i] = exc
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(len(frames))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    batcher.close()
+
+    assert isinstance(results[2], Exception)
+    for i in (0, 1, 3, 4, 5):
+        np.testing.assert_allclose(results[i], clf.predict_proba(frames[i]))
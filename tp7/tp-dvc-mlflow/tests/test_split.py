@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+from src.data.split import hashed_assign, stratified_assign
+
+RATIOS = (0.7, 0.15, 0.15)
+
+
+def make_frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "id": np.arange(n) + 1_000_000 * seed,
+        "workclass": rng.choice([" Private", " State-gov", " Self-emp"], n),
+        "occupation": rng.choice([f" occ-{i}" for i in range(40)], n),
+        "age": rng.normal(size=n),
+        "income": rng.choice([" <=50K", " >50K"], n, p=[0.76, 0.24]),
+    })
+
+
+def test_stratified_assign_sizes_and_class_mix():
+    df = make_frame(10_000)
+    assign = stratified_assign(df["income"], RATIOS, seed=42)
+
+    assert np.bincount(assign).tolist() == [7000, 1500, 1500]
+    overall = (df["income"] == " >50K").mean()
+    for k in range(3):
+        share = (df.loc[assign == k, "income"] == " >50K").mean()
+        assert abs(share - overall) < 1e-3
+
+
+def test_stratified_assign_is_seeded():
+    labels = make_frame(2_000)["income"]
+    a = stratified_assign(labels, RATIOS, seed=1)
+
+    assert (stratified_assign(labels, RATIOS, seed=1) == a).all()
+    assert (stratified_assign(labels, RATIOS, seed=2) != a).any()
+
+
+def test_hashed_assign_is_stable_when_rows_are_appended():
+    df = make_frame(5_000)
+    more = pd.concat([df, make_frame(3_000, seed=1)], ignore_index=True)
+
+    before = hashed_assign(df, ["id"], RATIOS, seed=42)
+    after = hashed_assign(more, ["id"], RATIOS, seed=42)
+
+    assert (after[: len(df)] == before).all()
+    shares = np.bincount(after, minlength=3) / len(after)
+    np.testing.assert_allclose(shares, RATIOS, atol=0.05)
+
+
+def test_hashed_assign_keeps_groups_together():
+    df = make_frame(5_000)
+    assign = hashed_assign(df, None, RATIOS, seed=42)
+
+    per_group = pd.Series(assign).groupby([df["workclass"], df["occupation"], df["income"]]).nunique()
+    assert (per_group == 1).all()
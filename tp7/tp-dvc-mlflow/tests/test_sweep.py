@@ -0,0 +1,42 @@
+from pathlib import Path
+
+import mlflow
+from src.train.features import FeatureStore
+from src.train.sweep import grid_candidates, is_valid, random_candidates, run_sweep
+
+SPLITS = Path(__file__).resolve().parents[1] / "data" / "splits"
+
+
+def test_grid_candidates_drop_invalid_solver_penalty_pairs():
+    space = {"C": [0.1, 1.0], "penalty": ["l1", "l2"], "solver": ["lbfgs", "liblinear"]}
+    candidates = [c for c in grid_candidates(space) if is_valid(c)]
+
+    assert len(candidates) == 6
+    assert {"C": 0.1, "penalty": "l1", "solver": "lbfgs"} not in candidates
+
+
+def test_random_candidates_respect_ranges():
+    space = {"C": {"low": 0.001, "high": 10, "log": True}, "solver": ["lbfgs", "saga"]}
+    candidates = random_candidates(space, 50, seed=0)
+
+    assert len(candidates) == 50
+    assert all(0.001 <= c["C"] <= 10 and c["solver"] in ("lbfgs", "saga") for c in candidates)
+    assert random_candidates(space, 50, seed=0) == candidates
+
+
+def test_run_sweep_stops_weak_trials_and_logs_nested_runs(tmp_path):
+    split_paths = {"train": SPLITS / "val.csv", "val": SPLITS / "test.csv", "test": SPLITS / "test.csv"}
+    cfg = {
+        "space": {"C": [0.01, 0.1, 1.0, 10.0], "encoder.min_frequency": [None, 50]},
+        "n_jobs": 2,
+        "early_stopping": {"budgets": [5, 100], "keep_fraction": 0.5},
+    }
+
+    mlflow.set_tracking_uri(f"file:{tmp_path / 'mlruns'}")
+    with mlflow.start_run() as parent:
+        result = run_sweep(split_paths, "csv", cfg, seed=42, store=FeatureStore(tmp_path / "features"))
+
+    statuses = [t["status"] for t in result["trials"]]
+    assert statuses.count("completed") == 4 and statuses.count("stopped@5") == 4
+    children = mlflow.search_runs(filter_string=f"tags.mlflow.parentRunId = '{parent.info.run_id}'")
+    assert len(children) == 8
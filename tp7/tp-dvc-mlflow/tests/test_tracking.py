@@ -0,0 +1,115 @@
+import threading
+
+import mlflow
+import pytest
+
+from src.train.tracking import MAX_ENTITIES, MAX_PARAMS, MAX_TAGS, AsyncLogger, start_run
+
+
+class RecordingClient:
+    """Stand-in for MlflowClient that records writes, optionally blocking."""
+
+    def __init__(self, fail_artifacts=False):
+        self.batches = []
+        self.artifacts = []
+        self.release = threading.Event()
+        self.release.set()
+        self.fail_artifacts = fail_artifacts
+
+    def log_batch(self, run_id, metrics=(), params=(), tags=()):
+        self.release.wait()
+        self.batches.append((run_id, list(metrics), list(params), list(tags)))
+
+    def log_artifact(self, run_id, local_path, artifact_path=None):
+        if self.fail_artifacts:
+            raise OSError("store unavailable")
+        self.artifacts.append((run_id, local_path, artifact_path))
+
+
+def test_queued_writes_are_merged_into_batches():
+    client = RecordingClient()
+    client.release.clear()
+    logger = AsyncLogger("run", client=client)
+    logger.log_param("first", 1)
+    for step in range(500):
+        logger.log_metric("loss", 1.0 / (step + 1), step=step)
+    logger.log_params({f"p{i}": i for i in range(MAX_PARAMS + 5)})
+    client.release.set()
+    logger.close()
+
+    metrics = [m for _, ms, _, _ in client.batches for m in ms]
+    params = [p for _, _, ps, _ in client.batches for p in ps]
+    assert [m.step for m in metrics] == list(range(500))
+    assert len(params) == MAX_PARAMS + 6
+    # The first write may go alone; the rest is batched within MLflow's limits.
+    assert len(client.batches) <= 3
+    assert all(len(ps) <= MAX_PARAMS for _, _, ps, _ in client.batches)
+
+
+def test_batches_stay_within_the_total_entity_limit():
+    client = RecordingClient()
+    client.release.clear()
+    logger = AsyncLogger("run", client=client)
+    logger.log_param("first", 1)
+    for step in range(1500):
+        logger.log_metric("loss", 1.0, step=step)
+    logger.log_params({f"p{i}": i for i in range(150)})
+    logger.set_tags({f"t{i}": i for i in range(150)})
+    client.release.set()
+    logger.close()
+
+    assert all(len(ms) + len(ps) + len(ts) <= MAX_ENTITIES for _, ms, ps, ts in client.batches)
+    assert all(len(ps) <= MAX_PARAMS and len(ts) <= MAX_TAGS for _, _, ps, ts in client.batches)
+    assert sum(len(ms) for _, ms, _, _ in client.batches) == 1500
+    assert sum(len(ps) for _, _, ps, _ in client.batches) == 151
+    assert sum(len(ts) for _, _, _, ts in client.batches) == 150
+
+
+def test_artifacts_follow_the_params_logged_before_them(tmp_path):
+    client = RecordingClient()
+    logger = AsyncLogger("run", client=client)
+    logger.log_param("seed", 42)
+    logger.log_artifact(tmp_path / "metrics.json")
+    logger.close()
+
+    assert client.batches[0][2][0].key == "seed"
+    assert client.artifacts == [("run", str(tmp_path / "metrics.json"), None)]
+
+
+def test_failed_write_is_raised_on_close_without_dropping_the_rest(tmp_path):
+    client = RecordingClient(fail_artifacts=True)
+    logger = AsyncLogger("run", client=client)
+    logger.log_artifact(tmp_path / "missing.json")
+    logger.log_metric("acc", 0.5)
+    with pytest.raises(OSError, match="store unavailable"):
+        logger.close()
+    assert client.batches[0][1][0].key == "acc"
+
+
+def test_start_run_flushes_before_the_run_ends_and_on_failure(tmp_path):
+    mlflow.set_tracking_uri(f"file:{tmp_path / 'mlruns'}")
+    (tmp_path / "report.json").write_text("{}")
+
+    with start_run() as run:
+        run.log_params({"seed": 42, "C": 0.5})
+        run.log_metrics({"acc": 0.8}, step=1)
+        run.log_artifact(tmp_path / "report.json")
+        child = run.child("trial-000")
+        child.log_metric("val_accuracy", 0.7)
+        child.end()
+    data = mlflow.get_run(run.run_id).data
+    assert data.params == {"seed": "42", "C": "0.5"}
+    assert data.metrics == {"acc": 0.8}
+    assert [f.path for f in mlflow.MlflowClient().list_artifacts(run.run_id)] == ["report.json"]
+    trial = mlflow.get_run(child.run_id)
+    assert trial.data.metrics == {"val_accuracy": 0.7}
+    assert trial.data.tags["mlflow.parentRunId"] == run.run_id
+    assert trial.info.status == "FINISHED"
+
+    with pytest.raises(ValueError):
+        with start_run() as failed:
+            failed.log_metric("partial", 1.0)
+            raise ValueError("fit failed")
+    finished = mlflow.get_run(failed.run_id)
+    assert finished.data.metrics == {"partial": 1.0}
+    assert finished.info.status == "FAILED"
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.download import COLUMNS
+from src.data.validate import build_profile, compare, ks, psi
+
+CFG = {"max_null_rate": 0.1, "psi_threshold": 0.2, "ks_threshold": 0.1}
+
+
+@pytest.fixture(scope="module")
+def raw():
+    return pd.read_csv("data/raw/adult.csv", nrows=5000)
+
+
+def write_raw(df, path):
+    df.to_csv(path, header=False, index=False)
+    return path
+
+
+def test_chunked_profile_matches_single_pass(raw, tmp_path):
+    path = write_raw(raw, tmp_path / "adult.data")
+    reference = build_profile(path, chunk_size=len(raw))
+    whole = build_profile(path, chunk_size=len(raw), reference=reference)
+    chunked = build_profile(path, chunk_size=700, reference=reference)
+
+    assert chunked["rows"] == whole["rows"] == len(raw)
+    for col in COLUMNS:
+        a, b = chunked["columns"][col], whole["columns"][col]
+        assert a["null_rate"] == b["null_rate"]
+        if a["kind"] == "numeric":
+            assert a["hist"] == b["hist"]
+            assert a["mean"] == pytest.approx(b["mean"])
+            assert a["std"] == pytest.approx(b["std"])
+        else:
+            assert a["counts"] == b["counts"]
+
+
+def test_missing_tokens_count_as_nulls(raw, tmp_path):
+    profile = build_profile(write_raw(raw, tmp_path / "adult.data"), chunk_size=1000)
+    expected = (raw["workclass"].str.strip() == "?").mean()
+    assert profile["columns"]["workclass"]["null_rate"] == pytest.approx(expected)
+    assert profile["columns"]["workclass"]["kind"] == "categorical"
+    assert profile["columns"]["age"]["kind"] == "numeric"
+
+
+def test_same_data_has_no_drift(raw, tmp_path):
+    path = write_raw(raw, tmp_path / "adult.data")
+    reference = build_profile(path, chunk_size=1000)
+    drift, failures = compare(build_profile(path, chunk_size=1000, reference=reference), reference, CFG)
+
+    assert failures == []
+    assert all(score == 0.0 for scores in drift.values() for score in scores.values())
+
+
+def test_shifted_numeric_and_category_mix_are_drift(raw, tmp_path):
+    reference = build_profile(write_raw(raw, tmp_path / "ref.data"), chunk_size=1000)
+    shifted = raw.copy()
+    shifted["age"] = shifted["age"] + 15
+    shifted["sex"] = " Female"
+    profile = build_profile(write_raw(shifted, tmp_path / "new.data"), chunk_size=1000, reference=reference)
+    drift, failures = compare(profile, reference, CFG)
+
+    assert drift["age"]["psi"] > CFG["psi_threshold"]
+    assert drift["age"]["ks"] > CFG["ks_threshold"]
+    assert drift["sex"]["psi"] > CFG["psi_threshold"]
+    assert drift["education"]["psi"] < CFG["psi_threshold"]
+    assert any(f.startswith("age: KS") for f in failures)
+    assert any(f.startswith("sex: PSI") for f in failures)
+
+
+def test_null_rate_and_schema_failures(raw, tmp_path):
+    reference = build_profile(write_raw(raw, tmp_path / "ref.data"), chunk_size=1000)
+    bad = raw.copy()
+    bad.loc[bad.index[: len(bad) // 4], "occupation"] = " ?"
+    profile = build_profile(write_raw(bad.drop(columns=["native_country"]), tmp_path / "new.data"),
+                            chunk_size=1000, reference=reference, names=COLUMNS[:-2] + COLUMNS[-1:])
+    _, failures = compare(profile, reference, CFG)
+
+    assert "missing column 'native_country'" in failures
+    assert any(f.startswith("occupation: null rate") for f in failures)
+
+
+def test_psi_and_ks_of_identical_and_disjoint_counts():
+    counts = np.array([10.0, 20.0, 30.0])
+    assert psi(counts, counts) == pytest.approx(0.0)
+    assert ks(counts, counts) == pytest.approx(0.0)
+    assert psi(counts, counts[::-1]) > 0.2
+    assert ks(np.array([1.0, 0.0]), np.array([0.0, 1.0])) == pytest.approx(1.0)